@@ -0,0 +1,42 @@
+"""add_entitled_epoch_indexes
+
+Revision ID: b540dd579c6a
+Revises: efed589eb984
+Create Date: 2026-10-19 10:12:04.118302
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b540dd579c6a"
+down_revision: str | Sequence[str] | None = "efed589eb984"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (channel_id, device_id, epoch) is already indexed by uq_channel_device_epoch
+    op.create_index(
+        "ix_channel_device_keys_channel_epoch",
+        "channel_device_keys",
+        ["channel_id", "epoch"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_devices_user_public_key",
+        "devices",
+        ["user_id", "public_key"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_devices_user_public_key", table_name="devices")
+    op.drop_index(
+        "ix_channel_device_keys_channel_epoch", table_name="channel_device_keys"
+    )
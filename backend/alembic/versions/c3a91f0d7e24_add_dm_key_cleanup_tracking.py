@@ -0,0 +1,44 @@
+"""add_dm_key_cleanup_tracking
+
+Revision ID: c3a91f0d7e24
+Revises: b540dd579c6a
+Create Date: 2026-10-19 13:40:27.512904
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a91f0d7e24"
+down_revision: str | Sequence[str] | None = "b540dd579c6a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "devices",
+        sa.Column("dm_keys_repointed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Devices deleted before this revision were re-pointed inline on delete
+    op.execute(
+        "UPDATE devices SET dm_keys_repointed_at = deleted_at "
+        "WHERE deleted_at IS NOT NULL"
+    )
+    op.create_index(
+        "ix_dm_device_keys_device_id",
+        "dm_device_keys",
+        ["device_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_dm_device_keys_device_id", table_name="dm_device_keys")
+    op.drop_column("devices", "dm_keys_repointed_at")
@@ -0,0 +1,39 @@
+"""add_server_directory_indexes
+
+Revision ID: d8b4e6a2c915
+Revises: c3a91f0d7e24
+Create Date: 2026-10-19 15:02:44.730116
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8b4e6a2c915"
+down_revision: str | Sequence[str] | None = "c3a91f0d7e24"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_servers_created_at_id",
+        "servers",
+        ["created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_server_members_user_id",
+        "server_members",
+        ["user_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_server_members_user_id", table_name="server_members")
+    op.drop_index("ix_servers_created_at_id", table_name="servers")
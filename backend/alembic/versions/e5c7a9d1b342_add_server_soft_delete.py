@@ -0,0 +1,40 @@
+"""add_server_soft_delete
+
+Revision ID: e5c7a9d1b342
+Revises: d8b4e6a2c915
+Create Date: 2026-10-19 16:21:08.413572
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5c7a9d1b342"
+down_revision: str | Sequence[str] | None = "d8b4e6a2c915"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "servers",
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # The purge deletes messages channel by channel
+    op.create_index(
+        "ix_messages_channel_id",
+        "messages",
+        ["channel_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_messages_channel_id", table_name="messages")
+    op.drop_column("servers", "deleted_at")
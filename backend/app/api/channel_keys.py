@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import case, or_
+import json
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, insert, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import aliased
 
 from app.api.deps import get_current_user
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
+from app.core.device_set_cache import device_set_cache
+from app.core.epoch_cache import epoch_cache
+from app.core.membership_cache import membership_cache
 from app.core.socket_manager import manager
 from app.models.channel import Channel
 from app.models.channel_device_key import ChannelDeviceKey
@@ -15,6 +23,7 @@ from app.models.server import Server
 from app.models.server_member import ServerMember
 from app.models.user import User
 from app.schemas.channel_keys import (
+    BulkDistributeKeyRequest,
     DistributeKeyRequest,
     EnableEncryptionRequest,
     EncryptedKeySubmission,
@@ -22,22 +31,54 @@ from app.schemas.channel_keys import (
 
 router = APIRouter(prefix="/channel-keys", tags=["Channel Keys"])
 
+MAX_BATCH_CHANNELS = 200
+MAX_ENTITLED_EPOCHS_PAGE = 1_000
+MAX_BULK_DISTRIBUTION_KEYS = 10_000
+# Keeps each multi-row INSERT well under Postgres' bind parameter limit
+BULK_INSERT_CHUNK_SIZE = 1_000
+
 
 async def _get_expected_trusted_device_ids_for_server(
     server_id: str,
     db: AsyncSession,
 ) -> set[str]:
-    result = await db.execute(
-        select(Device.id)
-        .join(ServerMember, Device.user_id == ServerMember.user_id)
-        .where(
-            ServerMember.server_id == server_id,
-            ServerMember.status == "accepted",
-            Device.is_trusted == True,
-            Device.deleted_at == None,
-        )
+    # Validation reads the live set; the cached snapshots only serve reads
+    devices = await device_set_cache.load_device_set(server_id, db)
+    return {d["device_id"] for d in devices}
+
+
+async def _is_accepted_channel_member(
+    channel_id: str, user_id, db: AsyncSession
+) -> bool:
+    server_id = await membership_cache.get_channel_server_id(channel_id, db)
+    if not server_id:
+        return False
+    return await membership_cache.is_accepted_member(server_id, user_id, db)
+
+
+async def _insert_channel_device_keys(
+    channel_id: str,
+    epoch: int,
+    owner_device_id,
+    encrypted_keys: list[EncryptedKeySubmission],
+    db: AsyncSession,
+):
+    # One batched multi-row INSERT instead of an ORM object per device
+    if not encrypted_keys:
+        return
+    await db.execute(
+        insert(ChannelDeviceKey),
+        [
+            {
+                "channel_id": channel_id,
+                "device_id": key.device_id,
+                "epoch": epoch,
+                "encrypted_channel_key": key.encrypted_channel_key,
+                "owner_device_id": owner_device_id,
+            }
+            for key in encrypted_keys
+        ],
     )
-    return {str(device_id) for device_id in result.scalars().all()}
 
 
 def _validate_submitted_device_ids(
@@ -122,21 +163,26 @@ async def _get_channel_key_row_for_device_or_public_key(
     return fallback_result.first()
 
 
-async def _get_entitled_epoch_rows_for_device_or_public_key(
+def _entitled_epochs_query(
     channel_id: str,
     requesting_device: Device,
-    db: AsyncSession,
+    min_epoch: int | None = None,
+    max_epoch: int | None = None,
+    limit: int | None = None,
 ):
     owner_device = aliased(Device)
     target_device = aliased(Device)
 
-    result = await db.execute(
+    # DISTINCT ON (epoch) keeps one key per epoch: the exact device's copy if it
+    # exists, otherwise the newest copy wrapped for the same public key
+    query = (
         select(
             ChannelDeviceKey.epoch,
             ChannelDeviceKey.encrypted_channel_key,
             owner_device.public_key.label("owner_public_key"),
             target_device.id.label("matched_device_id"),
         )
+        .distinct(ChannelDeviceKey.epoch)
         .join(owner_device, ChannelDeviceKey.owner_device_id == owner_device.id)
         .join(target_device, ChannelDeviceKey.device_id == target_device.id)
         .where(
@@ -153,15 +199,13 @@ async def _get_entitled_epoch_rows_for_device_or_public_key(
             ChannelDeviceKey.created_at.desc(),
         )
     )
-
-    deduped_rows = []
-    seen_epochs = set()
-    for row in result.all():
-        if row.epoch in seen_epochs:
-            continue
-        seen_epochs.add(row.epoch)
-        deduped_rows.append(row)
-    return deduped_rows
+    if min_epoch is not None:
+        query = query.where(ChannelDeviceKey.epoch >= min_epoch)
+    if max_epoch is not None:
+        query = query.where(ChannelDeviceKey.epoch <= max_epoch)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
 
 
 @router.get("/my-channels")
@@ -190,6 +234,88 @@ async def get_my_encrypted_channels(
     ]
 
 
+@router.get("/my-keys")
+async def get_my_current_channel_keys(
+    device_id: UUID,
+    channel_ids: list[UUID] | None = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Batch form of /{channel_id}/my-key: the current-epoch key for every encrypted
+    channel the caller can access (or just channel_ids), in one query.
+    Channels with no key for this device are listed in "missing".
+    """
+    if channel_ids and len(channel_ids) > MAX_BATCH_CHANNELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_CHANNELS} channel_ids per request.",
+        )
+
+    requesting_device = await _get_requesting_trusted_device(
+        device_id, current_user, db
+    )
+
+    owner_device = aliased(Device)
+    target_device = aliased(Device)
+    # DISTINCT ON keeps one row per channel: the exact device's key if present,
+    # otherwise the newest copy wrapped for the same public key (re-registered device)
+    query = (
+        select(
+            ChannelDeviceKey.channel_id,
+            ChannelDeviceKey.epoch,
+            ChannelDeviceKey.encrypted_channel_key,
+            ChannelDeviceKey.owner_device_id,
+            owner_device.public_key.label("owner_public_key"),
+        )
+        .distinct(ChannelDeviceKey.channel_id)
+        .join(
+            ChannelEncryption,
+            (ChannelEncryption.channel_id == ChannelDeviceKey.channel_id)
+            & (ChannelEncryption.current_epoch == ChannelDeviceKey.epoch),
+        )
+        .join(Channel, Channel.id == ChannelDeviceKey.channel_id)
+        .join(ServerMember, ServerMember.server_id == Channel.server_id)
+        .join(owner_device, ChannelDeviceKey.owner_device_id == owner_device.id)
+        .join(target_device, ChannelDeviceKey.device_id == target_device.id)
+        .where(
+            ChannelEncryption.is_enabled == True,
+            ServerMember.user_id == current_user.id,
+            ServerMember.status == "accepted",
+            target_device.user_id == requesting_device.user_id,
+            or_(
+                target_device.id == requesting_device.id,
+                target_device.public_key == requesting_device.public_key,
+            ),
+        )
+        .order_by(
+            ChannelDeviceKey.channel_id,
+            case((target_device.id == requesting_device.id, 0), else_=1),
+            ChannelDeviceKey.created_at.desc(),
+        )
+    )
+    if channel_ids:
+        query = query.where(ChannelDeviceKey.channel_id.in_(channel_ids))
+
+    result = await db.execute(query)
+    keys = [
+        {
+            "channel_id": str(row.channel_id),
+            "epoch": row.epoch,
+            "encrypted_channel_key": row.encrypted_channel_key,
+            "owner_device_id": str(row.owner_device_id),
+            "owner_device_public_key": row.owner_public_key,
+        }
+        for row in result.all()
+    ]
+
+    found = {key["channel_id"] for key in keys}
+    return {
+        "keys": keys,
+        "missing": [str(cid) for cid in channel_ids or [] if str(cid) not in found],
+    }
+
+
 @router.get("/server/{server_id}/user/{user_id}/encrypted-channels")
 async def get_user_encrypted_channels_in_server(
     server_id: str,
@@ -270,22 +396,17 @@ async def enable_channel_encryption(
         )
         db.add(encryption_record)
 
-        for key in req.encrypted_keys:
-            db.add(
-                ChannelDeviceKey(
-                    channel_id=channel_id,
-                    device_id=key.device_id,
-                    epoch=1,
-                    encrypted_channel_key=key.encrypted_channel_key,
-                    owner_device_id=owner_device.id,
-                )
-            )
+        await _insert_channel_device_keys(
+            channel_id, 1, owner_device.id, req.encrypted_keys, db
+        )
 
         await db.commit()
     except Exception:
         await db.rollback()
         raise
 
+    await epoch_cache.set_channel_epoch(channel_id, 1)
+
     return {"channel_id": channel_id, "epoch": 1}
 
 
@@ -300,17 +421,7 @@ async def get_my_current_channel_key(
         device_id, current_user, db
     )
 
-    membership_query = (
-        select(ServerMember)
-        .join(Channel, Channel.server_id == ServerMember.server_id)
-        .where(
-            Channel.id == channel_id,
-            ServerMember.user_id == current_user.id,
-            ServerMember.status == "accepted",
-        )
-    )
-    membership_res = await db.execute(membership_query)
-    if not membership_res.scalar_one_or_none():
+    if not await _is_accepted_channel_member(channel_id, current_user.id, db):
         raise HTTPException(
             status_code=403,
             detail="You are not an accepted member of this channel's server.",
@@ -395,19 +506,28 @@ async def rotate_channel_key(
         new_epoch = enc.current_epoch + 1
         enc.current_epoch = new_epoch
 
-        for key in req.encrypted_keys:
-            db.add(
-                ChannelDeviceKey(
-                    channel_id=channel_id,
-                    device_id=key.device_id,
-                    epoch=new_epoch,
-                    encrypted_channel_key=key.encrypted_channel_key,
-                    owner_device_id=owner_device.id,
-                )
-            )
+        await _insert_channel_device_keys(
+            channel_id, new_epoch, owner_device.id, req.encrypted_keys, db
+        )
 
         await db.commit()
+        await epoch_cache.set_channel_epoch(channel_id, new_epoch)
         try:
+            # Online devices get their own wrapped key directly, so they don't
+            # all have to come back to /my-key after the rotation
+            await manager.send_to_devices(
+                {
+                    key.device_id: {
+                        "type": "channel_key_delivered",
+                        "channel_id": channel_id,
+                        "epoch": new_epoch,
+                        "encrypted_channel_key": key.encrypted_channel_key,
+                        "owner_device_id": str(owner_device.id),
+                        "owner_device_public_key": owner_device.public_key,
+                    }
+                    for key in req.encrypted_keys
+                }
+            )
             await manager.broadcast_to_channel(
                 channel_id,
                 {
@@ -440,17 +560,7 @@ async def distribute_key_to_device(
         device_id, current_user, db
     )
 
-    membership_query = (
-        select(ServerMember)
-        .join(Channel, Channel.server_id == ServerMember.server_id)
-        .where(
-            Channel.id == channel_id,
-            ServerMember.user_id == current_user.id,
-            ServerMember.status == "accepted",
-        )
-    )
-    membership_res = await db.execute(membership_query)
-    if not membership_res.scalar_one_or_none():
+    if not await _is_accepted_channel_member(channel_id, current_user.id, db):
         raise HTTPException(
             status_code=403,
             detail="You are not an accepted member of this encrypted channel.",
@@ -508,27 +618,153 @@ async def distribute_key_to_device(
     return {"status": "success"}
 
 
+@router.post("/bulk-distribute")
+async def bulk_distribute_keys_to_device(
+    device_id: str,
+    req: BulkDistributeKeyRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Bulk form of /{channel_id}/distribute-to-device: every (channel, epoch) key
+    copy for one newly linked device, validated with set-based queries and
+    written with INSERT ... ON CONFLICT DO UPDATE.
+    """
+    if len(req.keys) > MAX_BULK_DISTRIBUTION_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_DISTRIBUTION_KEYS} keys per request.",
+        )
+    if not req.keys:
+        return {"status": "success", "distributed": 0}
+
+    pairs = [(key.channel_id, key.epoch) for key in req.keys]
+    if len(set(pairs)) != len(pairs):
+        raise HTTPException(
+            status_code=400,
+            detail="Duplicate (channel_id, epoch) entries are not allowed in keys.",
+        )
+
+    submitting_device = await _get_requesting_trusted_device(
+        device_id, current_user, db
+    )
+
+    targ_res = await db.execute(
+        select(Device.id).where(
+            Device.id == req.target_device_id,
+            Device.user_id == current_user.id,
+            Device.is_trusted == True,
+            Device.deleted_at == None,
+        )
+    )
+    if not targ_res.scalar_one_or_none():
+        raise HTTPException(
+            status_code=403,
+            detail="Target device does not belong to you or is untrusted.",
+        )
+
+    channel_ids = {key.channel_id for key in req.keys}
+    enc_res = await db.execute(
+        select(ChannelEncryption.channel_id, ChannelEncryption.current_epoch)
+        .join(Channel, Channel.id == ChannelEncryption.channel_id)
+        .join(ServerMember, ServerMember.server_id == Channel.server_id)
+        .where(
+            ChannelEncryption.channel_id.in_(channel_ids),
+            ChannelEncryption.is_enabled == True,
+            ServerMember.user_id == current_user.id,
+            ServerMember.status == "accepted",
+        )
+    )
+    current_epochs = {str(row.channel_id): row.current_epoch for row in enc_res.all()}
+
+    forbidden = sorted(channel_ids - current_epochs.keys())
+    if forbidden:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "message": "Not an accepted member of these encrypted channels.",
+                "channel_ids": forbidden,
+            },
+        )
+
+    invalid = [
+        {"channel_id": key.channel_id, "epoch": key.epoch}
+        for key in req.keys
+        if key.epoch < 1 or key.epoch > current_epochs[key.channel_id]
+    ]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Invalid epoch for channel key distribution.",
+                "keys": invalid,
+            },
+        )
+
+    rows = [
+        {
+            "channel_id": key.channel_id,
+            "device_id": req.target_device_id,
+            "epoch": key.epoch,
+            "encrypted_channel_key": key.encrypted_channel_key,
+            "owner_device_id": submitting_device.id,
+        }
+        for key in req.keys
+    ]
+    for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        stmt = pg_insert(ChannelDeviceKey).values(
+            rows[start : start + BULK_INSERT_CHUNK_SIZE]
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_channel_device_epoch",
+                set_={
+                    "encrypted_channel_key": stmt.excluded.encrypted_channel_key,
+                    "owner_device_id": stmt.excluded.owner_device_id,
+                },
+            )
+        )
+
+    await db.commit()
+    return {"status": "success", "distributed": len(rows)}
+
+
 @router.get("/{channel_id}/entitled-epochs")
 async def get_entitled_epochs(
     channel_id: str,
     device_id: str,
+    min_epoch: int | None = Query(None, ge=1),
+    max_epoch: int | None = Query(None, ge=1),
+    limit: int | None = Query(None, ge=1, le=MAX_ENTITLED_EPOCHS_PAGE),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Every epoch key this device (or a re-registration of its public key) holds
+    for the channel, oldest first. Streamed as a JSON array so channels with
+    long rotation histories don't have to be buffered in full.
+    """
     requesting_device = await _get_requesting_trusted_device(
         device_id, current_user, db
     )
-    rows = await _get_entitled_epoch_rows_for_device_or_public_key(
-        channel_id,
-        requesting_device,
-        db,
+    query = _entitled_epochs_query(
+        channel_id, requesting_device, min_epoch, max_epoch, limit
     )
 
-    return [
-        {
-            "epoch": row.epoch,
-            "encrypted_channel_key": row.encrypted_channel_key,
-            "owner_device_public_key": row.owner_public_key,
-        }
-        for row in rows
-    ]
+    async def stream_epochs():
+        # The request session may be closed once streaming starts; use our own
+        async with SessionLocal() as session:
+            result = await session.stream(query)
+            yield "["
+            first = True
+            async for row in result:
+                item = {
+                    "epoch": row.epoch,
+                    "encrypted_channel_key": row.encrypted_channel_key,
+                    "owner_device_public_key": row.owner_public_key,
+                }
+                yield ("" if first else ",") + json.dumps(item)
+                first = False
+            yield "]"
+
+    return StreamingResponse(stream_epochs(), media_type="application/json")
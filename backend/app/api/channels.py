@@ -6,9 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
+from app.core.membership_cache import membership_cache
 from app.models.channel import Channel
 from app.models.server import Server
-from app.models.server_member import MemberStatus, ServerMember
 from app.models.user import User
 from app.schemas.channel import ChannelCreate, ChannelResponse, ChannelUpdate
 
@@ -26,14 +26,7 @@ async def list_channels(
     User must be a member of the server.
     """
     # Verify membership
-    member_check = await db.execute(
-        select(ServerMember).where(
-            ServerMember.server_id == server_id,
-            ServerMember.user_id == current_user.id,
-            ServerMember.status == MemberStatus.ACCEPTED,
-        )
-    )
-    if not member_check.scalars().first():
+    if not await membership_cache.is_accepted_member(server_id, current_user.id, db):
         raise HTTPException(403, detail="Not a member of this server")
 
     # Get channels
@@ -58,8 +51,10 @@ async def create_channel(
     Create a new channel in a server.
     Only the server owner can create channels.
     """
-    # Verify ownership
-    server_result = await db.execute(select(Server).where(Server.id == server_id))
+    # Verify ownership; a deleted server is waiting to be purged
+    server_result = await db.execute(
+        select(Server).where(Server.id == server_id, Server.deleted_at == None)
+    )
     server = server_result.scalars().first()
 
     if not server:
@@ -151,5 +146,6 @@ async def delete_channel(
 
     await db.delete(channel)
     await db.commit()
+    membership_cache.forget_channel(channel_id)
 
     return {"message": "Channel deleted successfully"}
@@ -1,3 +1,5 @@
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -6,6 +8,7 @@ from sqlalchemy.future import select
 
 from app.core.database import get_db
 from app.core.security import ALGORITHM, SECRET_KEY
+from app.core.user_cache import user_cache
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
@@ -20,6 +23,11 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    # Fast path: token already decoded and resolved recently
+    snapshot = user_cache.get(token)
+    if snapshot is not None:
+        return User(**snapshot)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -28,10 +36,25 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
+    started = time.perf_counter()
     result = await db.execute(select(User).where(User.username == username))
     user = result.scalars().first()
+    user_cache.record_miss_lookup(time.perf_counter() - started)
 
     if user is None:
         raise credentials_exception
 
+    user_cache.set(token, _user_snapshot(user), payload.get("exp"))
     return user
+
+
+def _user_snapshot(user: User) -> dict:
+    # Detached copy of the columns routers read — never the password hash
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "character_id": user.character_id,
+        "is_active": user.is_active,
+        "created_at": user.created_at,
+    }
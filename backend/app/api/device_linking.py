@@ -8,17 +8,18 @@ Two paths for the new device:
   Path A (Real-time): Old device tab is open → WS notification fires immediately
   Path B (Async):     Old device tab is closed → request waits in DB, shown on next mount
 
-From the new device's perspective both paths are identical — it always polls.
+From the new device's perspective both paths are identical — it long-polls
+/request/{id}/wait, which returns the moment the request is approved or rejected.
 """
 
+import asyncio
 import base64
 import os
 import secrets
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-import webauthn
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -26,7 +27,11 @@ from sqlalchemy.future import select
 from app.api.deps import get_current_user
 from app.core import redis_client
 from app.core.database import get_db
+from app.core.device_set_cache import device_set_cache
+from app.core.epoch_cache import epoch_cache
+from app.core.link_events import link_events
 from app.core.socket_manager import manager
+from app.core.webauthn_verify import verify_authentication_response, webauthn_pool
 from app.models.device import Device
 from app.models.device_link_request import DeviceLinkRequest
 from app.models.dm_epoch import DmEpoch
@@ -49,6 +54,7 @@ DEVICE_LINK_EXPIRY_MINUTES = int(os.getenv("DEVICE_LINK_EXPIRY_MINUTES", "15"))
 WEBAUTHN_RP_ID = os.getenv("WEBAUTHN_RP_ID", "localhost")
 WEBAUTHN_ORIGIN = os.getenv("WEBAUTHN_ORIGIN", "http://localhost:3000")
 MAX_CHALLENGE_TTL = 60  # seconds
+LONG_POLL_MAX_SECONDS = 30
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
@@ -190,13 +196,8 @@ async def create_link_request(
         "temp_public_key": body.temp_public_key,
         "expires_at": expires_at.isoformat(),
     }
-    user_id_str = str(current_user.id)
-    for server_id, connections in manager.active_connections.items():
-        if user_id_str in connections:
-            try:
-                await connections[user_id_str].send_json(ws_payload)
-            except Exception:
-                pass  # Connection may have dropped — async path handles it
+    await manager.send_to_user(ws_payload, str(current_user.id))
+    await link_events.publish(f"user:{current_user.id}")
 
     return LinkRequestResponse(request_id=link_request.id, expires_at=expires_at)
 
@@ -276,6 +277,34 @@ async def get_pending_requests(
     ]
 
 
+# ── GET /device-linking/pending/wait ─────────────────────────────────────────
+
+
+@router.get("/pending/wait", response_model=list[PendingRequestResponse])
+async def wait_for_pending_requests(
+    timeout: int = Query(25, ge=1, le=LONG_POLL_MAX_SECONDS),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Long-poll form of /pending: returns as soon as a pending request exists
+    (immediately if one already does), or an empty list after timeout.
+    """
+    with link_events.listen(f"user:{current_user.id}") as created:
+        pending = await get_pending_requests(current_user, db)
+        if pending:
+            return pending
+
+        # Don't hold a pooled connection while we wait
+        await db.rollback()
+        try:
+            await asyncio.wait_for(created.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+    return await get_pending_requests(current_user, db)
+
+
 # ── GET /device-linking/request/{request_id}/status ─────────────────────────
 
 
@@ -286,7 +315,8 @@ async def get_request_status(
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Polled by the new device every 5 seconds until status = \"approved\" or \"rejected\".
+    Single status read. The new device normally long-polls /request/{id}/wait,
+    which returns this same payload the moment the status changes.
 
     Returns approved_by_device_public_key when approved — the new device needs this
     to run ECDH against its temp private key and decrypt the encrypted_private_key blob.
@@ -326,6 +356,44 @@ async def get_request_status(
     )
 
 
+# ── GET /device-linking/request/{request_id}/wait ───────────────────────────
+
+
+@router.get("/request/{request_id}/wait", response_model=StatusResponse)
+async def wait_for_request_status(
+    request_id: UUID,
+    timeout: int = Query(25, ge=1, le=LONG_POLL_MAX_SECONDS),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Long-poll form of /status for the new device. Returns as soon as the request
+    is approved or rejected (or right away if it already is); otherwise returns
+    the still-pending status after timeout and the client simply calls again.
+    """
+    with link_events.listen(f"request:{request_id}") as resolved:
+        result = await db.execute(
+            select(
+                DeviceLinkRequest.status, DeviceLinkRequest.requesting_user_id
+            ).where(DeviceLinkRequest.id == request_id)
+        )
+        row = result.first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Request not found")
+        if row.requesting_user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not your request")
+
+        if row.status == "pending":
+            # Don't hold a pooled connection while we wait
+            await db.rollback()
+            try:
+                await asyncio.wait_for(resolved.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    return await get_request_status(request_id, current_user, db)
+
+
 # ── POST /device-linking/approve/{request_id} ────────────────────────────────
 
 
@@ -441,7 +509,7 @@ async def approve_link_request(
             if isinstance(stored_challenge, bytes)
             else stored_challenge
         )
-        verified_authentication = webauthn.verify_authentication_response(
+        verified_authentication = await verify_authentication_response(
             credential=body.webauthn_assertion,
             expected_challenge=_base64url_to_bytes(challenge_value),
             expected_rp_id=WEBAUTHN_RP_ID,
@@ -483,33 +551,33 @@ async def approve_link_request(
 
     # Increment DM Epochs for all conversations involving this user
     # This forces future DMs to use the new epoch (containing this new device's public key)
-    await db.execute(
-        update(DmEpoch)
-        .where(
-            or_(
-                DmEpoch.user_a_id == current_user.id,
-                DmEpoch.user_b_id == current_user.id,
+    rotated_pairs = (
+        await db.execute(
+            update(DmEpoch)
+            .where(
+                or_(
+                    DmEpoch.user_a_id == current_user.id,
+                    DmEpoch.user_b_id == current_user.id,
+                )
             )
+            .values(current_epoch=DmEpoch.current_epoch + 1)
+            .returning(DmEpoch.user_a_id, DmEpoch.user_b_id, DmEpoch.current_epoch)
         )
-        .values(current_epoch=DmEpoch.current_epoch + 1)
-    )
+    ).all()
 
     # ── Step 7: Commit ────────────────────────────────────────────────────
+    # Stop serving the old epochs before the new ones are visible, then cache them
+    await epoch_cache.invalidate_dm_epochs(rotated_pairs)
     await db.commit()
+    await epoch_cache.set_dm_epochs(rotated_pairs)
+    await device_set_cache.bump_for_user(current_user.id, db)
 
     # Notify the new device via WebSocket if it's online (real-time path)
-    user_id_str = str(current_user.id)
-    for server_id, connections in manager.active_connections.items():
-        if user_id_str in connections:
-            try:
-                await connections[user_id_str].send_json(
-                    {
-                        "type": "device_link_approved",
-                        "request_id": str(request_id),
-                    }
-                )
-            except Exception:
-                pass
+    await manager.send_to_user(
+        {"type": "device_link_approved", "request_id": str(request_id)},
+        str(current_user.id),
+    )
+    await link_events.publish(f"request:{request_id}")
 
     return {"status": "approved"}
 
@@ -549,12 +617,24 @@ async def reject_link_request(
     link_request.status = "rejected"
     await db.commit()
 
+    await manager.send_to_user(
+        {"type": "device_link_rejected", "request_id": str(request_id)},
+        str(current_user.id),
+    )
+    await link_events.publish(f"request:{request_id}")
+
     return {
         "status": "rejected",
         "security_note": "If you did not initiate this, change your password immediately.",
     }
 
 
+@router.get("/webauthn/stats")
+async def get_webauthn_verify_stats(current_user: User = Depends(get_current_user)):
+    """Concurrency, queue time and run time of the WebAuthn verification pool."""
+    return webauthn_pool.stats()
+
+
 @router.post("/approve-with-passphrase/{request_id}")
 async def approve_with_passphrase(
     request_id: UUID,
@@ -626,31 +706,30 @@ async def approve_with_passphrase(
     # Increment DM epochs for all conversations involving this user —
     # same as the PRF approval path. Forces future DMs to use the new epoch
     # so the newly linked device receives keys for them.
-    await db.execute(
-        update(DmEpoch)
-        .where(
-            or_(
-                DmEpoch.user_a_id == current_user.id,
-                DmEpoch.user_b_id == current_user.id,
+    rotated_pairs = (
+        await db.execute(
+            update(DmEpoch)
+            .where(
+                or_(
+                    DmEpoch.user_a_id == current_user.id,
+                    DmEpoch.user_b_id == current_user.id,
+                )
             )
+            .values(current_epoch=DmEpoch.current_epoch + 1)
+            .returning(DmEpoch.user_a_id, DmEpoch.user_b_id, DmEpoch.current_epoch)
         )
-        .values(current_epoch=DmEpoch.current_epoch + 1)
-    )
+    ).all()
 
+    await epoch_cache.invalidate_dm_epochs(rotated_pairs)
     await db.commit()
+    await epoch_cache.set_dm_epochs(rotated_pairs)
+    await device_set_cache.bump_for_user(current_user.id, db)
 
     # Notify the new device if it's online
-    user_id_str = str(current_user.id)
-    for server_id, connections in manager.active_connections.items():
-        if user_id_str in connections:
-            try:
-                await connections[user_id_str].send_json(
-                    {
-                        "type": "device_link_approved",
-                        "request_id": str(request_id),
-                    }
-                )
-            except Exception:
-                pass
+    await manager.send_to_user(
+        {"type": "device_link_approved", "request_id": str(request_id)},
+        str(current_user.id),
+    )
+    await link_events.publish(f"request:{request_id}")
 
     return {"status": "approved"}
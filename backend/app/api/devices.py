@@ -13,22 +13,26 @@
 # """
 
 import uuid
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import update
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
+from app.core.device_set_cache import device_set_cache
+from app.core.dm_key_cleanup import dm_key_cleanup
+from app.core.membership_cache import membership_cache
 from app.models.device import Device
-from app.models.dm_device_key import DmDeviceKey
 from app.models.key_backup import KeyBackup
 from app.models.user import User
 from app.schemas.device import (
     DeviceRegisterRequest,
     DeviceRegisterResponse,
+    DeviceSetDiffResponse,
+    DmKeyCleanupResponse,
     MyDeviceResponse,
     PublicDeviceResponse,
     RecoveryDeviceRequest,
@@ -129,6 +133,9 @@ async def register_device(
             ),
         )
 
+    if new_device.is_trusted:
+        await device_set_cache.bump_for_user(current_user.id, db)
+
     return DeviceRegisterResponse(
         device_id=new_device.id,
         is_trusted=new_device.is_trusted,
@@ -219,6 +226,8 @@ async def get_user_trusted_devices(
 @router.get("/server/{server_id}", response_model=list[PublicDeviceResponse])
 async def get_server_trusted_devices(
     server_id: str,
+    response: Response,
+    if_none_match: str | None = Header(None),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -226,33 +235,58 @@ async def get_server_trusted_devices(
     Returns all trusted device public keys for every member of a server.
     Used by the frontend when enabling channel encryption to encrypt the
     initial Epoch 1 key for all current members.
-    """
-    from app.models.server_member import ServerMember
 
+    The ETag is the server's device set version; send it back as If-None-Match
+    to get a 304 when nothing changed.
+    """
     # Verify current user is in the server
-    member_query = select(ServerMember).where(
-        ServerMember.server_id == server_id, ServerMember.user_id == current_user.id
-    )
-    member_res = await db.execute(member_query)
-    if not member_res.scalar_one_or_none():
+    if not await membership_cache.get_membership(server_id, current_user.id, db):
         raise HTTPException(status_code=403, detail="Not a member of this server.")
 
-    # Fetch all trusted un-deleted devices for all accepted members
-    result = await db.execute(
-        select(Device)
-        .join(ServerMember, Device.user_id == ServerMember.user_id)
-        .where(
-            ServerMember.server_id == server_id,
-            ServerMember.status == "accepted",
-            Device.is_trusted == True,
-            Device.deleted_at == None,
-        )
+    version = await device_set_cache.get_version(server_id)
+    if version is not None:
+        etag = f'"{version}"'
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        response.headers["ETag"] = etag
+
+    _, devices = await device_set_cache.get_device_set(server_id, db)
+    return [PublicDeviceResponse(**d) for d in devices]
+
+
+@router.get("/server/{server_id}/diff", response_model=DeviceSetDiffResponse)
+async def get_server_trusted_devices_diff(
+    server_id: str,
+    since_version: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Returns the devices added and removed since since_version.
+    Falls back to the full set (full=True) if that version is no longer cached.
+    """
+    if not await membership_cache.get_membership(server_id, current_user.id, db):
+        raise HTTPException(status_code=403, detail="Not a member of this server.")
+
+    version, devices = await device_set_cache.get_device_set(server_id, db)
+    previous = (
+        await device_set_cache.get_snapshot(server_id, since_version)
+        if version is not None and since_version <= version
+        else None
     )
-    devices = result.scalars().all()
+    if previous is None:
+        return DeviceSetDiffResponse(
+            version=version, full=True, added=devices, removed=[]
+        )
 
-    return [
-        PublicDeviceResponse(device_id=d.id, public_key=d.public_key) for d in devices
-    ]
+    previous_ids = {d["device_id"] for d in previous}
+    current_ids = {d["device_id"] for d in devices}
+    return DeviceSetDiffResponse(
+        version=version,
+        full=False,
+        added=[d for d in devices if d["device_id"] not in previous_ids],
+        removed=sorted(previous_ids - current_ids),
+    )
 
 
 # ─────────────────────────────────────────
@@ -275,16 +309,14 @@ async def delete_device(
        a member of encrypted channels, the channel owner should rotate the epoch.
        The frontend must surface: "Removing this device will require channel key rotation."
 
-    2. DM key cleanup: a background job must run:
-         UPDATE dm_device_keys
-         SET device_id = NULL, deleted_device_id = <this device's id>
-         WHERE device_id = <this device's id>
-       This preserves the distinction between "message predates device" and
-       "device was deleted" (see dm_device_key.py docstring).
+    DM key cleanup is queued, not done inline: dm_key_cleanup re-points this
+    device's dm_device_keys rows (device_id=NULL, deleted_device_id=<id>) in
+    batches after the response. A long-lived device can own millions of rows,
+    and one UPDATE would hold locks that block new DM key inserts. Progress is
+    at GET /devices/{device_id}/dm-key-cleanup.
 
-    This endpoint only removes the device row. The DB CASCADE handles
-    device_link_requests and channel_device_keys cleanup automatically.
-    dm_device_keys.device_id becomes NULL via the SET NULL FK.
+    This endpoint only soft-deletes the device row, so deleted devices drop out
+    of every trusted-device query and receive no new DM key rows.
     """
     result = await db.execute(select(Device).where(Device.id == device_id))
     device = result.scalars().first()
@@ -299,24 +331,46 @@ async def delete_device(
         )
 
     # SOFT DELETE
-    device.deleted_at = datetime.utcnow()
-
-    # Tombstone dm_device_keys in the same transaction so there is no window
-    # where device_id is NULL but deleted_device_id is still unset.
-    # This preserves the frontend's ability to distinguish:
-    #   device_id=NULL + deleted_device_id SET   → "encrypted for a device you removed"
-    #   device_id=NULL + deleted_device_id NULL  → "predates this device"
-    await db.execute(
-        update(DmDeviceKey)
-        .where(DmDeviceKey.device_id == device_id)
-        .values(
-            device_id=None,
-            deleted_device_id=device_id,
-        )
-        .execution_options(synchronize_session="fetch")
-    )
+    device.deleted_at = datetime.now(timezone.utc)
+    device.dm_keys_repointed_at = None
 
     await db.commit()
+    await device_set_cache.bump_for_user(current_user.id, db)
+
+    # Each batch sets device_id=NULL and deleted_device_id together, so there is
+    # never a row where device_id is NULL but deleted_device_id is unset.
+    dm_key_cleanup.schedule(device_id)
+
+
+@router.get("/{device_id}/dm-key-cleanup", response_model=DmKeyCleanupResponse)
+async def get_dm_key_cleanup_progress(
+    device_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Progress of re-pointing a deleted device's DM key rows."""
+    result = await db.execute(select(Device).where(Device.id == device_id))
+    device = result.scalars().first()
+
+    if device is None:
+        raise HTTPException(status_code=404, detail="Device not found")
+
+    if device.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own devices",
+        )
+
+    if device.deleted_at is None:
+        raise HTTPException(status_code=400, detail="Device is not deleted")
+
+    return await dm_key_cleanup.get_progress(device, db)
+
+
+@router.get("/dm-key-cleanup/stats")
+async def get_dm_key_cleanup_stats(current_user: User = Depends(get_current_user)):
+    """Queue depth and throughput of the DM key cleanup job on this worker."""
+    return dm_key_cleanup.stats()
 
 
 @router.post("/recover", response_model=DeviceRegisterResponse)
@@ -359,6 +413,7 @@ async def recover_device(
             existing.is_trusted = True
             await db.commit()
             await db.refresh(existing)
+            await device_set_cache.bump_for_user(current_user.id, db)
         return DeviceRegisterResponse(
             device_id=existing.id, is_trusted=existing.is_trusted
         )
@@ -373,4 +428,5 @@ async def recover_device(
     db.add(device)
     await db.commit()
     await db.refresh(device)
+    await device_set_cache.bump_for_user(current_user.id, db)
     return DeviceRegisterResponse(device_id=device.id, is_trusted=device.is_trusted)
@@ -3,11 +3,15 @@ from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, desc, func, or_, select
+from sqlalchemy import and_, desc, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
+from app.core.epoch_cache import epoch_cache
+from app.core.socket_manager import manager
 from app.models.device import Device
 from app.models.direct_message import DirectMessage
 from app.models.dm_device_key import DmDeviceKey
@@ -15,14 +19,154 @@ from app.models.dm_epoch import DmEpoch
 from app.models.user import User
 from app.schemas.direct_message import (
     ConversationResponse,
+    DeviceCiphertextItem,
     DeviceCiphertextSubmission,
     DirectMessageCreate,
     DirectMessageResponse,
     DirectMessageUpdate,
+    EncryptedDirectMessageCreate,
+    MyCiphertextBatchRequest,
 )
 
 router = APIRouter()
 
+# Upper bound on message ids per batch ciphertext request
+MAX_BATCH_CIPHERTEXTS = 100
+
+# Postgres' default name for the unnamed direct_messages primary key
+DM_PRIMARY_KEY = "direct_messages_pkey"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def _integrity_details(error: IntegrityError) -> tuple[str | None, str | None]:
+    """Returns (constraint name, SQLSTATE) of the driver error behind `error`."""
+    # asyncpg's exception is chained behind SQLAlchemy's DBAPI adapter
+    driver_error = getattr(error.orig, "__cause__", None) or error.orig
+    return (
+        getattr(driver_error, "constraint_name", None),
+        getattr(driver_error, "sqlstate", None),
+    )
+
+
+async def _resolve_dm_epoch(
+    sender_id: UUID, receiver_id: UUID, db: AsyncSession, use_cache: bool = True
+) -> tuple[int, bool]:
+    """
+    Returns (current epoch, served from cache) without taking a row lock.
+
+    Served from the shared epoch cache when possible. On a miss the row is
+    created with INSERT ... ON CONFLICT DO NOTHING RETURNING, so concurrent
+    first sends no longer race uq_dm_epoch_pair, and existing rows are read
+    with a plain SELECT. Callers cache a database-read epoch only after their
+    transaction commits (_cache_dm_epoch); rotation paths write the new epoch.
+    """
+    # Canonical Ordering for DM Epoch
+    user_a_id = min(sender_id, receiver_id)
+    user_b_id = max(sender_id, receiver_id)
+
+    if use_cache:
+        cached_epoch = await epoch_cache.get_dm_epoch(user_a_id, user_b_id)
+        if cached_epoch is not None:
+            return cached_epoch, True
+
+    insert_res = await db.execute(
+        pg_insert(DmEpoch)
+        .values(user_a_id=user_a_id, user_b_id=user_b_id, current_epoch=1)
+        .on_conflict_do_nothing(constraint="uq_dm_epoch_pair")
+        .returning(DmEpoch.current_epoch)
+    )
+    current_epoch = insert_res.scalar()
+
+    if current_epoch is None:
+        epoch_res = await db.execute(
+            select(DmEpoch.current_epoch).where(
+                DmEpoch.user_a_id == user_a_id, DmEpoch.user_b_id == user_b_id
+            )
+        )
+        current_epoch = epoch_res.scalar_one()
+
+    return current_epoch, False
+
+
+async def _cache_dm_epoch(sender_id: UUID, receiver_id: UUID, epoch: int):
+    await epoch_cache.set_dm_epoch(
+        min(sender_id, receiver_id), max(sender_id, receiver_id), epoch
+    )
+
+
+async def _validate_dm_device_ids(
+    device_ciphertexts: list[DeviceCiphertextItem],
+    sender_id: UUID,
+    receiver_id: UUID,
+    db: AsyncSession,
+):
+    submitted_device_ids = [c.device_id for c in device_ciphertexts]
+    if len(set(submitted_device_ids)) != len(submitted_device_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="Duplicate device_id entries are not allowed in device_ciphertexts.",
+        )
+
+    if not submitted_device_ids:
+        return
+
+    # Validate every device_id against the sender/receiver device set in one query
+    dev_res = await db.execute(
+        select(Device.id).where(
+            Device.id.in_(submitted_device_ids),
+            Device.user_id.in_([sender_id, receiver_id]),
+            Device.deleted_at == None,
+        )
+    )
+    valid_device_ids = set(dev_res.scalars().all())
+    for device_id in submitted_device_ids:
+        if device_id not in valid_device_ids:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Device {device_id} does not belong to sender or receiver",
+            )
+
+
+async def _insert_dm_device_keys(
+    dm_id: UUID,
+    device_ciphertexts: list[DeviceCiphertextItem],
+    db: AsyncSession,
+):
+    # One multi-row INSERT for every device's ciphertext slice
+    if not device_ciphertexts:
+        return
+    await db.execute(
+        insert(DmDeviceKey),
+        [
+            {
+                "dm_id": dm_id,
+                "device_id": c.device_id,
+                "encrypted_ciphertext": c.encrypted_ciphertext,
+            }
+            for c in device_ciphertexts
+        ],
+    )
+
+
+async def _get_trusted_sender_device(
+    sender_device_id: UUID | None, current_user: User, db: AsyncSession
+):
+    if not sender_device_id:
+        raise HTTPException(400, detail="Encrypted DMs require sender_device_id")
+
+    sender_device_result = await db.execute(
+        select(Device).where(
+            Device.id == sender_device_id,
+            Device.user_id == current_user.id,
+            Device.is_trusted == True,
+            Device.deleted_at == None,
+        )
+    )
+    sender_device = sender_device_result.scalar_one_or_none()
+    if not sender_device:
+        raise HTTPException(400, detail="Sender device is invalid or not trusted")
+    return sender_device
+
 
 @router.get("/conversations", response_model=list[ConversationResponse])
 async def list_conversations(
@@ -138,18 +282,21 @@ async def get_conversation_messages(
     from sqlalchemy.orm import aliased
 
     SenderDevice = aliased(Device)
+    ReceiverUser = aliased(User)
 
     # Build query for messages between current_user and target user
     query = (
         select(
             DirectMessage,
             User.username.label("sender_username"),
+            ReceiverUser.username.label("receiver_username"),
             DmDeviceKey.encrypted_ciphertext,
             DmDeviceKey.device_id.label("ciphertext_active_device"),
             DmDeviceKey.deleted_device_id,
             SenderDevice.public_key.label("sender_public_key"),
         )
         .join(User, DirectMessage.sender_id == User.id)
+        .join(ReceiverUser, DirectMessage.receiver_id == ReceiverUser.id)
         .outerjoin(SenderDevice, DirectMessage.sender_device_id == SenderDevice.id)
         .outerjoin(
             DmDeviceKey,
@@ -190,33 +337,26 @@ async def get_conversation_messages(
     result = await db.execute(query)
     rows = result.all()
 
-    # Mark received messages as read
-    await db.execute(
-        select(DirectMessage).where(
-            DirectMessage.sender_id == user_id,
-            DirectMessage.receiver_id == current_user.id,
-            ~DirectMessage.is_read,
-        )
-    )
-
-    unread_messages = (
+    # Mark received messages as read in a single UPDATE
+    read_at = datetime.utcnow()
+    marked_read_ids = set(
         (
             await db.execute(
-                select(DirectMessage).where(
+                update(DirectMessage)
+                .where(
                     DirectMessage.sender_id == user_id,
                     DirectMessage.receiver_id == current_user.id,
                     ~DirectMessage.is_read,
                 )
+                .values(is_read=True, read_at=read_at)
+                .returning(DirectMessage.id)
+                .execution_options(synchronize_session=False)
             )
         )
         .scalars()
         .all()
     )
 
-    for msg in unread_messages:
-        msg.is_read = True
-        msg.read_at = datetime.utcnow()
-
     await db.commit()
 
     # Build response
@@ -241,12 +381,6 @@ async def get_conversation_messages(
             else:
                 device_key_status = "predates_device"
 
-        # Get receiver username
-        receiver_result = await db.execute(
-            select(User.username).where(User.id == msg.receiver_id)
-        )
-        receiver_username = receiver_result.scalar()
-
         msg_dict = {
             "id": msg.id,
             "sender_id": msg.sender_id,
@@ -260,11 +394,12 @@ async def get_conversation_messages(
             "device_key_status": device_key_status,
             "edited_at": msg.edited_at,
             "is_deleted": msg.is_deleted,
-            "is_read": msg.is_read,
-            "read_at": msg.read_at,
+            # The rows were loaded before the UPDATE; report what it just marked
+            "is_read": msg.is_read or msg.id in marked_read_ids,
+            "read_at": read_at if msg.id in marked_read_ids else msg.read_at,
             "created_at": msg.created_at,
             "sender_username": sender_username,
-            "receiver_username": receiver_username,
+            "receiver_username": row.receiver_username,
         }
         messages.append(msg_dict)
 
@@ -295,42 +430,19 @@ async def send_direct_message(
         raise HTTPException(400, detail="Cannot send message to yourself")
 
     if message_in.is_encrypted:
-        if not message_in.sender_device_id:
-            raise HTTPException(400, detail="Encrypted DMs require sender_device_id")
-
-        sender_device_result = await db.execute(
-            select(Device).where(
-                Device.id == message_in.sender_device_id,
-                Device.user_id == current_user.id,
-                Device.is_trusted == True,
-                Device.deleted_at == None,
-            )
-        )
-        if not sender_device_result.scalar_one_or_none():
-            raise HTTPException(400, detail="Sender device is invalid or not trusted")
+        await _get_trusted_sender_device(message_in.sender_device_id, current_user, db)
 
     # Content still needed if plaintext fallback is used, otherwise clients send "[encrypted]"
     if not message_in.content or len(message_in.content) > 2000:
         raise HTTPException(400, detail="Message must be 1-2000 characters")
 
     try:
-        # Canonical Ordering for DM Epoch
-        user_a_id = min(current_user.id, receiver.id)
-        user_b_id = max(current_user.id, receiver.id)
-
-        epoch_query = (
-            select(DmEpoch)
-            .where(DmEpoch.user_a_id == user_a_id, DmEpoch.user_b_id == user_b_id)
-            .with_for_update()
-        )
-        epoch_res = await db.execute(epoch_query)
-        dm_epoch = epoch_res.scalar_one_or_none()
-
-        if not dm_epoch:
-            dm_epoch = DmEpoch(
-                user_a_id=user_a_id, user_b_id=user_b_id, current_epoch=1
+        current_epoch = None
+        epoch_cached = True
+        if message_in.is_encrypted:
+            current_epoch, epoch_cached = await _resolve_dm_epoch(
+                current_user.id, receiver.id, db
             )
-            db.add(dm_epoch)
 
         # Create message
         new_message = DirectMessage(
@@ -338,7 +450,7 @@ async def send_direct_message(
             receiver_id=message_in.receiver_id,
             content=message_in.content,
             is_encrypted=message_in.is_encrypted,
-            epoch=dm_epoch.current_epoch if message_in.is_encrypted else None,
+            epoch=current_epoch,
             sender_device_id=message_in.sender_device_id,
         )
         db.add(new_message)
@@ -347,6 +459,9 @@ async def send_direct_message(
         await db.rollback()
         raise e
 
+    if not epoch_cached:
+        await _cache_dm_epoch(current_user.id, receiver.id, current_epoch)
+
     await db.refresh(new_message)
 
     # Build a raw dict response (we will update DirectMessageResponse schema separately)
@@ -387,38 +502,156 @@ async def submit_device_keys(
             status_code=403, detail="Only sender can attach device keys"
         )
 
+    await _validate_dm_device_ids(
+        payload.device_ciphertexts, msg.sender_id, msg.receiver_id, db
+    )
+
     try:
-        # Insert all ciphertexts
-        for ciphertext_obj in payload.device_ciphertexts:
-            # Validate each device_id belongs to the sender or receiver
-            dev_res = await db.execute(
-                select(Device).where(
-                    Device.id == ciphertext_obj.device_id,
-                    or_(
-                        Device.user_id == msg.sender_id,
-                        Device.user_id == msg.receiver_id,
-                    ),
-                    Device.deleted_at == None,
-                )
+        await _insert_dm_device_keys(message_id, payload.device_ciphertexts, db)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+    return {"status": "success"}
+
+
+@router.get("/epoch/{user_id}")
+async def get_conversation_epoch(
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Returns the current DM epoch for the conversation with a user.
+    Clients encrypt under this epoch before calling POST /messages/encrypted.
+    """
+    user_a_id = min(current_user.id, user_id)
+    user_b_id = max(current_user.id, user_id)
+
+    current_epoch = await epoch_cache.get_dm_epoch(user_a_id, user_b_id)
+    if current_epoch is None:
+        result = await db.execute(
+            select(DmEpoch.current_epoch).where(
+                DmEpoch.user_a_id == user_a_id, DmEpoch.user_b_id == user_b_id
             )
-            if not dev_res.scalar_one_or_none():
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"Device {ciphertext_obj.device_id} does not belong to sender or receiver",
-                )
+        )
+        current_epoch = result.scalar()
+
+    # A conversation without a row starts at epoch 1 on its first send
+    return {"user_id": user_id, "epoch": current_epoch or 1}
+
+
+@router.post("/messages/encrypted")
+async def send_encrypted_direct_message(
+    message_in: EncryptedDirectMessageCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Single-request E2EE DM send.
+
+    The client generates the message id up front and uses it as the HKDF salt,
+    so the message row and every device ciphertext are committed atomically.
+    Recipients are notified with dm_received server-side — no client relay.
+    """
+    receiver_result = await db.execute(
+        select(User).where(User.id == message_in.receiver_id)
+    )
+    receiver = receiver_result.scalars().first()
+
+    if not receiver:
+        raise HTTPException(404, detail="Receiver not found")
 
-            key_record = DmDeviceKey(
-                dm_id=message_id,
-                device_id=ciphertext_obj.device_id,
-                encrypted_ciphertext=ciphertext_obj.encrypted_ciphertext,
+    if receiver.id == current_user.id:
+        raise HTTPException(400, detail="Cannot send message to yourself")
+
+    await _get_trusted_sender_device(message_in.sender_device_id, current_user, db)
+
+    if not message_in.content or len(message_in.content) > 2000:
+        raise HTTPException(400, detail="Message must be 1-2000 characters")
+
+    if not message_in.device_ciphertexts:
+        raise HTTPException(400, detail="Encrypted DMs require device_ciphertexts")
+
+    await _validate_dm_device_ids(
+        message_in.device_ciphertexts, current_user.id, receiver.id, db
+    )
+
+    try:
+        current_epoch, epoch_cached = await _resolve_dm_epoch(
+            current_user.id, receiver.id, db
+        )
+        if message_in.epoch != current_epoch and epoch_cached:
+            # Confirm a mismatch against the database before answering 409
+            current_epoch, epoch_cached = await _resolve_dm_epoch(
+                current_user.id, receiver.id, db, use_cache=False
+            )
+        if message_in.epoch != current_epoch:
+            raise HTTPException(
+                409,
+                detail="DM epoch has changed. Fetch the latest epoch and retry.",
             )
-            db.add(key_record)
+
+        new_message = DirectMessage(
+            id=message_in.id,
+            sender_id=current_user.id,
+            receiver_id=receiver.id,
+            content=message_in.content,
+            is_encrypted=True,
+            epoch=current_epoch,
+            sender_device_id=message_in.sender_device_id,
+        )
+        db.add(new_message)
+        await db.flush()
+
+        await _insert_dm_device_keys(new_message.id, message_in.device_ciphertexts, db)
         await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        constraint, sqlstate = _integrity_details(e)
+        if constraint == DM_PRIMARY_KEY:
+            raise HTTPException(
+                409, detail="A message with this id already exists"
+            ) from None
+        if sqlstate == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(
+                400, detail="The receiver or a target device no longer exists"
+            ) from None
+        raise
     except Exception as e:
         await db.rollback()
         raise e
 
-    return {"status": "success"}
+    if not epoch_cached:
+        await _cache_dm_epoch(current_user.id, receiver.id, current_epoch)
+
+    # Only a shell goes over the socket so devices know WHICH message to fetch
+    ws_message = {
+        "id": str(new_message.id),
+        "epoch": new_message.epoch,
+        "sender_id": str(new_message.sender_id),
+        "receiver_id": str(new_message.receiver_id),
+        "created_at": new_message.created_at.isoformat(),
+        "is_encrypted": True,
+    }
+    for target_user_id in (new_message.receiver_id, new_message.sender_id):
+        await manager.send_to_user(
+            {"type": "dm_received", "message": ws_message}, str(target_user_id)
+        )
+
+    return {
+        "id": new_message.id,
+        "sender_id": new_message.sender_id,
+        "receiver_id": new_message.receiver_id,
+        "content": new_message.content,
+        "is_encrypted": True,
+        "epoch": new_message.epoch,
+        "sender_device_id": new_message.sender_device_id,
+        "created_at": new_message.created_at,
+        "sender_username": current_user.username,
+        "receiver_username": receiver.username,
+    }
 
 
 @router.patch("/messages/{message_id}", response_model=DirectMessageResponse)
@@ -456,12 +689,7 @@ async def update_direct_message(
     await db.commit()
     await db.refresh(message)
 
-    # Get usernames
-    sender_result = await db.execute(
-        select(User.username).where(User.id == message.sender_id)
-    )
-    sender_username = sender_result.scalar()
-
+    # Only the sender can edit, so the sender username is already known
     receiver_result = await db.execute(
         select(User.username).where(User.id == message.receiver_id)
     )
@@ -477,7 +705,7 @@ async def update_direct_message(
         is_read=message.is_read,
         read_at=message.read_at,
         created_at=message.created_at,
-        sender_username=sender_username,
+        sender_username=current_user.username,
         receiver_username=receiver_username,
     )
 
@@ -588,3 +816,90 @@ async def get_my_dm_ciphertext(
         "created_at": message.created_at.isoformat(),
         "is_encrypted": message.is_encrypted,
     }
+
+
+@router.post("/messages/my-ciphertext")
+async def get_my_dm_ciphertexts(
+    body: MyCiphertextBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Batch form of /messages/{message_id}/my-ciphertext, for the burst of
+    dm_received events a client gets on reconnect.
+
+    One join returns every requested message the caller takes part in together
+    with this device's ciphertext and the sender device's public key. Messages
+    that are unknown, not the caller's, deleted, or have no ciphertext for this
+    device are listed in "missing".
+    """
+    message_ids = list(dict.fromkeys(body.message_ids))
+    if len(message_ids) > MAX_BATCH_CIPHERTEXTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_CIPHERTEXTS} message_ids per request.",
+        )
+    if not message_ids:
+        return {"ciphertexts": [], "missing": []}
+
+    from sqlalchemy.orm import aliased
+
+    RequestingDevice = aliased(Device)
+    SenderDevice = aliased(Device)
+
+    # Joining the requesting device on user_id also proves the device is the
+    # caller's, which the single-message endpoint never checked
+    result = await db.execute(
+        select(
+            DirectMessage.id,
+            DirectMessage.epoch,
+            DirectMessage.sender_id,
+            DirectMessage.created_at,
+            DirectMessage.is_encrypted,
+            DmDeviceKey.encrypted_ciphertext,
+            SenderDevice.public_key.label("sender_public_key"),
+        )
+        .join(DmDeviceKey, DmDeviceKey.dm_id == DirectMessage.id)
+        .join(
+            RequestingDevice,
+            and_(
+                RequestingDevice.id == DmDeviceKey.device_id,
+                RequestingDevice.user_id == current_user.id,
+                RequestingDevice.deleted_at == None,
+            ),
+        )
+        .outerjoin(
+            SenderDevice,
+            and_(
+                SenderDevice.id == DirectMessage.sender_device_id,
+                SenderDevice.deleted_at == None,
+            ),
+        )
+        .where(
+            DirectMessage.id.in_(message_ids),
+            DmDeviceKey.device_id == body.device_id,
+            or_(
+                DirectMessage.sender_id == current_user.id,
+                DirectMessage.receiver_id == current_user.id,
+            ),
+            ~DirectMessage.is_deleted,
+        )
+    )
+
+    ciphertexts = [
+        {
+            "id": str(row.id),
+            "epoch": row.epoch,
+            "encrypted_ciphertext": row.encrypted_ciphertext,
+            "sender_public_key": row.sender_public_key,
+            "sender_id": str(row.sender_id),
+            "created_at": row.created_at.isoformat(),
+            "is_encrypted": row.is_encrypted,
+        }
+        for row in result.all()
+    ]
+    found = {item["id"] for item in ciphertexts}
+    return {
+        "ciphertexts": ciphertexts,
+        "missing": [str(mid) for mid in message_ids if str(mid) not in found],
+    }
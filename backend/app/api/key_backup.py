@@ -5,11 +5,11 @@ import secrets
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from webauthn import verify_registration_response
 
 from app.api.deps import get_current_user
 from app.core import redis_client
 from app.core.database import get_db
+from app.core.webauthn_verify import verify_registration_response
 from app.models.key_backup import KeyBackup
 from app.models.user import User
 from app.schemas.key_backup import ChallengeResponse, KeyBackupCreate, KeyBackupResponse
@@ -90,7 +90,7 @@ async def upsert_key_backup(
             )
 
         try:
-            verified_registration = verify_registration_response(
+            verified_registration = await verify_registration_response(
                 credential=body.prf_registration_credential,
                 expected_challenge=base64url_to_bytes(stored_challenge_value),
                 expected_rp_id=WEBAUTHN_RP_ID,
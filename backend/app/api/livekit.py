@@ -1,45 +1,27 @@
 import os
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_current_user
 from app.core.database import get_db
 from app.core.livekit_manager import (
     audio_room_name,
     create_guest_token,
-    create_user_token,
     get_livekit_url,
+    get_user_token,
     video_room_name,
 )
-from app.core.security import ALGORITHM, SECRET_KEY
+from app.core.livekit_token_cache import livekit_token_cache
+from app.core.membership_cache import membership_cache
 from app.models.user import User
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
-
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+# Upper bound on zone video rooms per prefetch request
+MAX_PREFETCH_ZONES = 20
 
 
 @router.get("/token")
@@ -48,19 +30,72 @@ async def get_livekit_token(
     current_user: User = Depends(get_current_user),
 ):
 
-    token = create_user_token(
+    token, expires_at = get_user_token(
         room_name=room_name,
         user_id=str(current_user.id),
         username=current_user.username,
     )
     return {
         "token": token,
+        "expires_at": expires_at,
         "livekit_url": get_livekit_url(),
         "room_name": room_name,
         "identity": str(current_user.id),
     }
 
 
+class TokenPrefetchRequest(BaseModel):
+    server_id: UUID
+    zone_ids: list[str] = []
+
+
+@router.post("/tokens")
+async def prefetch_livekit_tokens(
+    body: TokenPrefetchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    The server's audio token plus a token per nearby zone video room, in one
+    call, so entering a zone or rejoining audio doesn't wait on a token request.
+    """
+    zone_ids = list(dict.fromkeys(body.zone_ids))
+    if len(zone_ids) > MAX_PREFETCH_ZONES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_PREFETCH_ZONES} zone_ids per request.",
+        )
+
+    if not await membership_cache.is_accepted_member(
+        body.server_id, current_user.id, db
+    ):
+        raise HTTPException(403, detail="Not a member of this server")
+
+    def room_token(room_name: str) -> dict:
+        token, expires_at = get_user_token(
+            room_name=room_name,
+            user_id=str(current_user.id),
+            username=current_user.username,
+        )
+        return {"room_name": room_name, "token": token, "expires_at": expires_at}
+
+    return {
+        "livekit_url": get_livekit_url(),
+        "identity": str(current_user.id),
+        "audio": room_token(audio_room_name(str(body.server_id))),
+        "video": [
+            {"zone_id": zone_id, **room_token(video_room_name(zone_id))}
+            for zone_id in zone_ids
+        ],
+    }
+
+
+@router.get("/token-cache/stats")
+async def get_token_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit rate and size of the LiveKit access token cache."""
+    return livekit_token_cache.stats()
+
+
 class InviteRequest(BaseModel):
     room_name: str
     guest_label: str = "Guest"
@@ -7,16 +7,52 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
+from app.core.epoch_cache import epoch_cache
+from app.core.membership_cache import membership_cache
+from app.core.socket_manager import manager
 from app.models.channel import Channel
 from app.models.channel_encryption import ChannelEncryption
 from app.models.message import Message
-from app.models.server_member import MemberStatus, ServerMember
 from app.models.user import User
 from app.schemas.message import MessageCreate, MessageResponse, MessageUpdate
 
 router = APIRouter()
 
 
+async def _publish_channel_event(channel_id, payload: dict):
+    """
+    Pushes a canonical channel event to the sockets subscribed to that channel.
+    Clients never relay channel messages themselves, so payloads can't be spoofed.
+    """
+    try:
+        await manager.broadcast_to_channel(str(channel_id), payload)
+    except Exception as e:
+        print(f"WS Broadcast failed (non-fatal): {e}")
+
+
+async def _load_channel_epoch(channel_id, db: AsyncSession) -> int:
+    """
+    Reads the channel's current epoch (0 = unencrypted) and refreshes the cache.
+    The refill is set-if-newer, so it can't undo a rotation that committed
+    after this read.
+    """
+    enc_result = await db.execute(
+        select(ChannelEncryption.current_epoch).where(
+            ChannelEncryption.channel_id == channel_id,
+            ChannelEncryption.is_enabled == True,
+        )
+    )
+    current_epoch = enc_result.scalar() or 0
+    await epoch_cache.set_channel_epoch(channel_id, current_epoch)
+    return current_epoch
+
+
+def _matches_channel_encryption(message_in: MessageCreate, current_epoch: int) -> bool:
+    if current_epoch:
+        return message_in.is_encrypted and message_in.epoch == current_epoch
+    return not message_in.is_encrypted
+
+
 @router.get("/channels/{channel_id}/messages", response_model=list[MessageResponse])
 async def list_messages(
     channel_id: UUID,
@@ -30,21 +66,12 @@ async def list_messages(
     Returns most recent messages first.
     """
     # Get channel and verify access
-    channel_result = await db.execute(select(Channel).where(Channel.id == channel_id))
-    channel = channel_result.scalars().first()
-
-    if not channel:
+    server_id = await membership_cache.get_channel_server_id(channel_id, db)
+    if not server_id:
         raise HTTPException(404, detail="Channel not found")
 
     # Verify membership
-    member_check = await db.execute(
-        select(ServerMember).where(
-            ServerMember.server_id == channel.server_id,
-            ServerMember.user_id == current_user.id,
-            ServerMember.status == MemberStatus.ACCEPTED,
-        )
-    )
-    if not member_check.scalars().first():
+    if not await membership_cache.is_accepted_member(server_id, current_user.id, db):
         raise HTTPException(403, detail="Not a member of this server")
 
     # Build query
@@ -109,42 +136,33 @@ async def create_message(
     Send a message to a channel.
     """
     # Get channel and verify access
-    channel_result = await db.execute(select(Channel).where(Channel.id == channel_id))
-    channel = channel_result.scalars().first()
-
-    if not channel:
+    server_id = await membership_cache.get_channel_server_id(channel_id, db)
+    if not server_id:
         raise HTTPException(404, detail="Channel not found")
 
     # Verify membership
-    member_check = await db.execute(
-        select(ServerMember).where(
-            ServerMember.server_id == channel.server_id,
-            ServerMember.user_id == current_user.id,
-            ServerMember.status == MemberStatus.ACCEPTED,
-        )
-    )
-    if not member_check.scalars().first():
+    if not await membership_cache.is_accepted_member(server_id, current_user.id, db):
         raise HTTPException(403, detail="Not a member of this server")
 
     # Validate content
     if not message_in.content or len(message_in.content) > 2000:
         raise HTTPException(400, detail="Message must be 1-2000 characters")
 
-    enc_result = await db.execute(
-        select(ChannelEncryption).where(
-            ChannelEncryption.channel_id == channel_id,
-            ChannelEncryption.is_enabled == True,
-        )
-    )
-    channel_encryption = enc_result.scalars().first()
+    current_epoch = await epoch_cache.get_channel_epoch(channel_id)
+    if current_epoch is None or not _matches_channel_encryption(
+        message_in, current_epoch
+    ):
+        # Cache miss, or a rejection that a stale cache entry could cause —
+        # confirm against the database before answering.
+        current_epoch = await _load_channel_epoch(channel_id, db)
 
-    if channel_encryption:
+    if current_epoch:
         if not message_in.is_encrypted or message_in.epoch is None:
             raise HTTPException(
                 400,
                 detail="This channel requires encrypted messages",
             )
-        if message_in.epoch != channel_encryption.current_epoch:
+        if message_in.epoch != current_epoch:
             raise HTTPException(
                 409,
                 detail="Channel key has rotated. Fetch the latest channel key and retry.",
@@ -184,6 +202,15 @@ async def create_message(
         epoch=new_message.epoch,
     )
 
+    await _publish_channel_event(
+        channel_id,
+        {
+            "type": "chat_message",
+            "scope": "channel",
+            **response.model_dump(mode="json"),
+        },
+    )
+
     return response
 
 
@@ -231,6 +258,17 @@ async def update_message(
         is_deleted=message.is_deleted,
         created_at=message.created_at,
         username=current_user.username,
+        is_encrypted=message.is_encrypted or False,
+        epoch=message.epoch,
+    )
+
+    await _publish_channel_event(
+        message.channel_id,
+        {
+            "type": "channel_message_updated",
+            "channel_id": str(message.channel_id),
+            "message": response.model_dump(mode="json"),
+        },
     )
 
     return response
@@ -278,4 +316,13 @@ async def delete_message(
 
     await db.commit()
 
+    await _publish_channel_event(
+        message.channel_id,
+        {
+            "type": "channel_message_deleted",
+            "channel_id": str(message.channel_id),
+            "message_id": str(message.id),
+        },
+    )
+
     return {"message": "Message deleted successfully"}
@@ -1,20 +1,30 @@
+import base64
 import os
+from datetime import datetime, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import delete, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
+from app.core.device_set_cache import device_set_cache
+from app.core.membership_cache import membership_cache
+from app.core.server_directory_cache import server_directory_cache
+from app.core.server_purge import server_purge
 from app.models.channel import Channel
-from app.models.message import Message
-from app.models.server import Server
+from app.models.server import Server, ServerAccessType
 from app.models.server_member import MemberRole, MemberStatus, ServerMember
 from app.models.user import User
 from app.models.zone import Zone
-from app.schemas.server import ServerCreate, ServerResponse, ServerUpdate
+from app.schemas.server import (
+    ServerCreate,
+    ServerDeletionResponse,
+    ServerResponse,
+    ServerUpdate,
+)
 from app.schemas.zone import ZoneResponse
 from app.utils.map_parser import parse_map_zones
 
@@ -24,26 +34,95 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 FRONTEND_DIR = os.getenv("FRONTEND_DIR", os.path.join(BASE_DIR, "../frontend"))
 router = APIRouter()
 
+DEFAULT_SERVER_PAGE = 50
+MAX_SERVER_PAGE = 100
+
+
+def _encode_cursor(created_at: datetime, server_id) -> str:
+    raw = f"{created_at.isoformat()}|{server_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, server_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(server_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
 
 @router.get("/", response_model=list[ServerResponse])
 async def get_servers(
-    db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(DEFAULT_SERVER_PAGE, ge=1, le=MAX_SERVER_PAGE),
+    cursor: str | None = Query(None, description="X-Next-Cursor of the last page"),
+    member: bool = Query(False, description="Only servers I'm a member of"),
+    public: bool = Query(False, description="Only public servers"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(Server).options(selectinload(Server.owner)))
-    servers = result.scalars().all()
-    out = []
-    for s in servers:
-        d = ServerResponse(
-            id=s.id,
-            name=s.name,
-            owner_id=s.owner_id,
-            owner_username=s.owner.username if s.owner else None,
-            created_at=s.created_at,
-            access_type=s.access_type,
-            map_config=s.map_config,
+    """
+    Server directory, newest first, keyset-paginated on (created_at, id).
+    The next page's cursor is returned in the X-Next-Cursor header (absent on
+    the last page). Shared pages are served from a short-TTL cache.
+    """
+    cache_params = f"{limit}:{cursor or ''}:{int(public)}"
+    version = None
+    if not member:
+        version, page = await server_directory_cache.get(cache_params)
+        if page is not None:
+            if page["next_cursor"]:
+                response.headers["X-Next-Cursor"] = page["next_cursor"]
+            return page["servers"]
+
+    query = (
+        select(Server, User.username.label("owner_username"))
+        .outerjoin(User, Server.owner_id == User.id)
+        .where(Server.deleted_at == None)
+        .order_by(Server.created_at.desc(), Server.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(
+            tuple_(Server.created_at, Server.id) < tuple_(*_decode_cursor(cursor))
         )
-        out.append(d)
-    return out
+    if member:
+        query = query.join(
+            ServerMember,
+            (ServerMember.server_id == Server.id)
+            & (ServerMember.user_id == current_user.id)
+            & (ServerMember.status == MemberStatus.ACCEPTED),
+        )
+    if public:
+        query = query.where(Server.access_type == ServerAccessType.PUBLIC)
+
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Server
+        next_cursor = _encode_cursor(last.created_at, last.id)
+
+    servers = [
+        ServerResponse(
+            id=row.Server.id,
+            name=row.Server.name,
+            owner_id=row.Server.owner_id,
+            owner_username=row.owner_username,
+            created_at=row.Server.created_at,
+            access_type=row.Server.access_type,
+            map_config=row.Server.map_config,
+        ).model_dump(mode="json")
+        for row in rows
+    ]
+
+    if not member:
+        await server_directory_cache.set(
+            version, cache_params, {"servers": servers, "next_cursor": next_cursor}
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return servers
 
 
 @router.post("/create-server", response_model=ServerResponse)
@@ -126,6 +205,7 @@ async def create_server(
 
     await db.commit()
     await db.refresh(new_server)
+    await server_directory_cache.invalidate()
 
     return new_server
 
@@ -137,7 +217,9 @@ async def get_server(
     current_user: User = Depends(get_current_user),
 ):
     result = await db.execute(
-        select(Server).where(Server.id == server_id).options(selectinload(Server.owner))
+        select(Server)
+        .where(Server.id == server_id, Server.deleted_at == None)
+        .options(selectinload(Server.owner))
     )
     server = result.scalars().first()
     if not server:
@@ -162,7 +244,9 @@ async def update_server(
 ):
     """Rename a server (owner only)."""
     result = await db.execute(
-        select(Server).where(Server.id == server_id).options(selectinload(Server.owner))
+        select(Server)
+        .where(Server.id == server_id, Server.deleted_at == None)
+        .options(selectinload(Server.owner))
     )
     server = result.scalars().first()
     if not server:
@@ -175,6 +259,7 @@ async def update_server(
         server.name = payload.name
     await db.commit()
     await db.refresh(server)
+    await server_directory_cache.invalidate()
     return ServerResponse(
         id=server.id,
         name=server.name,
@@ -186,13 +271,21 @@ async def update_server(
     )
 
 
-@router.delete("/{server_id}")
+@router.delete("/{server_id}", status_code=202)
 async def delete_server(
     server_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Delete a server (owner only)."""
+    """
+    Delete a server (owner only).
+
+    The server is only marked deleted here: it drops out of every lookup and
+    its sockets are closed, while members, channels (with their keys and
+    messages) and zones are purged in batches after the response. A large
+    server would otherwise hold one transaction open for the whole cascade.
+    Progress is at GET /servers/{server_id}/deletion.
+    """
     result = await db.execute(select(Server).where(Server.id == server_id))
     server = result.scalars().first()
 
@@ -204,30 +297,50 @@ async def delete_server(
             status_code=403, detail="Only the owner can delete this server"
         )
 
-    # Manually cascade delete dependent records to avoid Foreign Key constraint errors
-    # 1. Get all channels for this server to delete their messages
-    channels_result = await db.execute(
-        select(Channel.id).where(Channel.server_id == server_id)
-    )
-    channel_ids = channels_result.scalars().all()
+    if server.deleted_at is None:
+        server.deleted_at = datetime.now(timezone.utc)
+        await db.commit()
+        await server_directory_cache.invalidate()
 
-    if channel_ids:
-        await db.execute(delete(Message).where(Message.channel_id.in_(channel_ids)))
+        from app.core.socket_manager import manager
 
-    # 2. Delete the channels themselves
-    await db.execute(delete(Channel).where(Channel.server_id == server_id))
+        await manager.close_server(
+            str(server_id), {"type": "server_deleted", "server_id": str(server_id)}
+        )
 
-    # 3. Delete zones
-    await db.execute(delete(Zone).where(Zone.server_id == server_id))
+    server_purge.schedule(server_id)
 
-    # 4. Delete server members
-    await db.execute(delete(ServerMember).where(ServerMember.server_id == server_id))
+    return {"message": "Server deletion started", "status": "deleting"}
 
-    # 5. Delete the server
-    await db.delete(server)
-    await db.commit()
 
-    return {"message": "Server deleted successfully"}
+@router.get("/purge/stats")
+async def get_server_purge_stats(current_user: User = Depends(get_current_user)):
+    """Queue depth and throughput of the server purge job on this worker."""
+    return server_purge.stats()
+
+
+@router.get("/{server_id}/deletion", response_model=ServerDeletionResponse)
+async def get_server_deletion_progress(
+    server_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Progress of purging a deleted server. 404 once the purge has finished."""
+    result = await db.execute(select(Server).where(Server.id == server_id))
+    server = result.scalars().first()
+
+    if not server:
+        raise HTTPException(status_code=404, detail="Server not found")
+
+    if server.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Only the owner can view this server's deletion"
+        )
+
+    if server.deleted_at is None:
+        raise HTTPException(status_code=400, detail="Server is not deleted")
+
+    return await server_purge.get_progress(server, db)
 
 
 @router.post("/{server_id}/join")
@@ -236,7 +349,9 @@ async def join_server(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    result = await db.execute(select(Server).where(Server.id == server_id))
+    result = await db.execute(
+        select(Server).where(Server.id == server_id, Server.deleted_at == None)
+    )
     server = result.scalars().first()
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
@@ -267,6 +382,8 @@ async def join_server(
 
     db.add(new_member)
     await db.commit()
+    await membership_cache.invalidate(server_id, current_user.id)
+    await device_set_cache.bump([server_id])
 
     # --- ADD THIS WS BROADCAST ---
     if new_status == MemberStatus.ACCEPTED:  # If it's a public server join
@@ -307,20 +424,11 @@ async def list_members(
     current_user: User = Depends(get_current_user),
 ):
 
-    result = await db.execute(select(Server).where(Server.id == server_id))
-    server = result.scalars().first()
-    if not server:
-        raise HTTPException(status_code=404, detail="Server not found")
-
     # Allow any member to view member list (not just owner)
-    member_result = await db.execute(
-        select(ServerMember).where(
-            ServerMember.server_id == server_id,
-            ServerMember.user_id == current_user.id,
-            ServerMember.status == MemberStatus.ACCEPTED,
-        )
-    )
-    if not member_result.scalars().first():
+    if not await membership_cache.is_accepted_member(server_id, current_user.id, db):
+        result = await db.execute(select(Server.id).where(Server.id == server_id))
+        if not result.scalar():
+            raise HTTPException(status_code=404, detail="Server not found")
         raise HTTPException(403, detail="Only members can view member list")
 
     result = await db.execute(
@@ -349,9 +457,13 @@ async def approve_member(
     current_user: User = Depends(get_current_user),
 ):
     # 1. Verify Owner (Security Check)
-    server_res = await db.execute(select(Server).where(Server.id == server_id))
+    server_res = await db.execute(
+        select(Server).where(Server.id == server_id, Server.deleted_at == None)
+    )
     server = server_res.scalars().first()
-    if not server or server.owner_id != current_user.id:
+    if not server:
+        raise HTTPException(404, detail="Server not found")
+    if server.owner_id != current_user.id:
         raise HTTPException(403, detail="Not authorized")
 
     # 2. Find the Pending Member
@@ -368,6 +480,8 @@ async def approve_member(
     # 3. Approve
     member.status = MemberStatus.ACCEPTED
     await db.commit()
+    await membership_cache.invalidate(server_id, user_id)
+    await device_set_cache.bump([server_id])
     return {"message": "User approved"}
 
 
@@ -380,9 +494,13 @@ async def reject_member(
 ):
 
     # 1. Check Owner
-    server_res = await db.execute(select(Server).where(Server.id == server_id))
+    server_res = await db.execute(
+        select(Server).where(Server.id == server_id, Server.deleted_at == None)
+    )
     server = server_res.scalars().first()
-    if not server or server.owner_id != current_user.id:
+    if not server:
+        raise HTTPException(404, detail="Server not found")
+    if server.owner_id != current_user.id:
         raise HTTPException(403, detail="Not authorized")
 
     # 2. Get Member
@@ -398,6 +516,12 @@ async def reject_member(
     # 3. Delete (Reject/Kick)
     await db.delete(member)
     await db.commit()
+    await membership_cache.invalidate(server_id, user_id)
+    await device_set_cache.bump([server_id])
+
+    from app.core.socket_manager import manager
+
+    await manager.drop_channel_subscriptions(str(server_id), str(user_id))
 
     return {"message": "Member rejected/removed"}
 
@@ -429,6 +553,7 @@ async def delete_channel(
 
     await db.delete(channel)
     await db.commit()
+    membership_cache.forget_channel(channel_id)
 
     return {"message": "Channel deleted successfully"}
 
@@ -441,10 +566,15 @@ async def kick_member(
     current_user: User = Depends(get_current_user),
 ):
     # Ensure current user is the server owner
-    server_result = await db.execute(select(Server).where(Server.id == server_id))
+    server_result = await db.execute(
+        select(Server).where(Server.id == server_id, Server.deleted_at == None)
+    )
     server = server_result.scalars().first()
 
-    if not server or server.owner_id != current_user.id:
+    if not server:
+        raise HTTPException(status_code=404, detail="Server not found")
+
+    if server.owner_id != current_user.id:
         raise HTTPException(
             status_code=403, detail="Only the server owner can kick members"
         )
@@ -465,10 +595,14 @@ async def kick_member(
 
     await db.delete(member)
     await db.commit()
+    await membership_cache.invalidate(server_id, user_id)
+    await device_set_cache.bump([server_id])
 
     # Broadcast departure so online users rotate the E2EE keys
     from app.core.socket_manager import manager
 
+    await manager.drop_channel_subscriptions(str(server_id), str(user_id))
+
     try:
         await manager.broadcast_to_server(
             str(server_id),
@@ -495,7 +629,9 @@ async def leave_server(
     Owners cannot leave their own servers.
     """
     # 1. Fetch the server to ensure it exists and check ownership
-    server_result = await db.execute(select(Server).where(Server.id == server_id))
+    server_result = await db.execute(
+        select(Server).where(Server.id == server_id, Server.deleted_at == None)
+    )
     server = server_result.scalars().first()
 
     if not server:
@@ -524,10 +660,14 @@ async def leave_server(
     # 4. Remove the user from the server
     await db.delete(member)
     await db.commit()
+    await membership_cache.invalidate(server_id, current_user.id)
+    await device_set_cache.bump([server_id])
 
     # 5. Broadcast departure for E2EE key rotation (Forward Secrecy)
     from app.core.socket_manager import manager
 
+    await manager.drop_channel_subscriptions(str(server_id), str(current_user.id))
+
     try:
         await manager.broadcast_to_server(
             str(server_id),
@@ -2,19 +2,24 @@ from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.api.deps import get_current_user
 from app.core.database import get_db
-from app.core.security import ACCESS_TOKEN_EXPIRE_WEEK, create_access_token
+from app.core.security import (
+    ACCESS_TOKEN_EXPIRE_WEEK,
+    create_access_token,
+    hash_password,
+    password_pool,
+    verify_password,
+)
+from app.core.user_cache import user_cache
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 
 @router.post("/register", response_model=UserResponse)
 async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -31,7 +36,7 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
             status_code=400, detail="Username or Email already registered"
         )
 
-    hashed_pw = pwd_context.hash(user.password)
+    hashed_pw = await hash_password(user.password)
 
     new_user = User(username=user.username, email=user.email, hashed_password=hashed_pw)
 
@@ -50,7 +55,7 @@ async def login(
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalars().first()
 
-    if not user or not pwd_context.verify(form_data.password, user.hashed_password):
+    if not user or not await verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
     # Create access token with explicit expiration
@@ -65,3 +70,15 @@ async def login(
         "user_id": user.id,
         "username": user.username,
     }
+
+
+@router.get("/auth-cache/stats")
+async def get_auth_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit rate and miss-lookup latency of the authenticated-user cache."""
+    return user_cache.stats()
+
+
+@router.get("/password-hashing/stats")
+async def get_password_hashing_stats(current_user: User = Depends(get_current_user)):
+    """Concurrency, queue time and run time of the password hashing pool."""
+    return password_pool.stats()
@@ -2,6 +2,7 @@ import asyncio
 import datetime
 import random
 import time
+import uuid
 
 from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
 from jose import JWTError, jwt
@@ -10,10 +11,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import redis_client
 from app.core.database import SessionLocal, get_db
+from app.core.membership_cache import membership_cache
+from app.core.proximity_manager import proximity_manager
 from app.core.security import ALGORITHM, SECRET_KEY
 from app.core.socket_manager import manager
 from app.core.spatial_manager import spatial_manager
 from app.core.zone_manager import zone_manager
+from app.models.channel import Channel
+from app.models.device import Device
 from app.models.server import Server
 from app.models.server_member import ServerMember
 from app.models.user import User
@@ -25,6 +30,23 @@ _last_db_save: dict[str, float] = {}
 DB_SAVE_THROTTLE_SECONDS = 10  # write to DB at most once per 10s per user
 
 
+async def push_proximity_diffs(server_id: str, diffs: dict):
+    """Sends each affected user only the peers that entered/left their nearby set."""
+    for target_id, (joined, left) in diffs.items():
+        await manager.send_personal_message(
+            {"type": "proximity_update", "joined": list(joined), "left": list(left)},
+            server_id,
+            target_id,
+        )
+
+
+def _parse_uuid(value) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
 async def get_user_from_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -63,6 +85,11 @@ async def websocket_endpoint(
 
     result = await db.execute(select(Server).where(Server.id == server_id))
     server_obj = result.scalars().first()
+    if server_obj is None or server_obj.deleted_at is not None:
+        # Same close code close_server() uses when the server is deleted
+        await manager.disconnect(websocket, server_id, user_id)
+        await websocket.close(code=4004)
+        return
     spawn_points = []
 
     if server_obj and server_obj.map_config:
@@ -135,6 +162,20 @@ async def websocket_endpoint(
             websocket,
         )
 
+        diffs = await proximity_manager.move(server_id, user_id, default_x, default_y)
+        diffs.pop(user_id, None)
+        await push_proximity_diffs(server_id, diffs)
+        # The client cleared its nearby set on disconnect. Send the whole set:
+        # on a fast reconnect the user is still in the grid and move() only
+        # returns what changed.
+        await websocket.send_json(
+            {
+                "type": "proximity_update",
+                "joined": list(proximity_manager.get_nearby(server_id, user_id)),
+                "left": [],
+            }
+        )
+
     async def save_position_to_db(x: int, y: int):
         """Write position to Postgres. Called throttled on move + always on disconnect."""
         try:
@@ -199,6 +240,13 @@ async def websocket_endpoint(
                     websocket,
                 )
 
+                await push_proximity_diffs(
+                    server_id,
+                    await proximity_manager.move(
+                        server_id, user_id, data["x"], data["y"]
+                    ),
+                )
+
                 if redis_client.r:
                     mapping = {
                         "x": str(data["x"]),
@@ -290,6 +338,65 @@ async def websocket_endpoint(
                                     member_id,
                                 )
 
+            # ── Channel subscriptions (targeted channel fan-out) ─────────────
+            elif data.get("type") == "channel_subscribe":
+                channel_id = _parse_uuid(data.get("channel_id"))
+                if channel_id is None:
+                    await websocket.send_json(
+                        {"type": "error", "message": "Invalid channel_id"}
+                    )
+                    continue
+
+                async with SessionLocal() as session:
+                    # Re-checked on every subscribe: the member may have been
+                    # removed since this socket connected
+                    if not await membership_cache.is_accepted_member(
+                        server_id, user_uuid, session
+                    ):
+                        await websocket.send_json(
+                            {"type": "error", "message": "Not a member of this server"}
+                        )
+                        continue
+
+                    # Only channels that belong to this socket's server can be joined
+                    channel_result = await session.execute(
+                        select(Channel.id).where(
+                            Channel.id == channel_id, Channel.server_id == server_id
+                        )
+                    )
+                    if channel_result.scalar() is None:
+                        continue
+
+                manager.subscribe_channel(websocket, str(channel_id))
+
+            elif data.get("type") == "device_register":
+                # Lets key rotations push this device its own wrapped key
+                device_id = _parse_uuid(data.get("device_id"))
+                if device_id is None:
+                    await websocket.send_json(
+                        {"type": "error", "message": "Invalid device_id"}
+                    )
+                    continue
+
+                async with SessionLocal() as session:
+                    device_result = await session.execute(
+                        select(Device.id).where(
+                            Device.id == device_id,
+                            Device.user_id == user_uuid,
+                            Device.is_trusted == True,
+                            Device.deleted_at == None,
+                        )
+                    )
+                    if device_result.scalar() is None:
+                        continue
+
+                manager.register_device(websocket, str(device_id))
+
+            elif data.get("type") == "channel_unsubscribe":
+                channel_id = data.get("channel_id")
+                if channel_id:
+                    manager.unsubscribe_channel(websocket, str(channel_id))
+
             elif data.get("type") == "request_users":
                 if redis_client.r:
                     online_users = await redis_client.r.smembers(
@@ -343,22 +450,11 @@ async def websocket_endpoint(
                         server_id,
                     )
 
-                # Channel-scoped persistent messages (broadcast to all in server)
+                # Channel-scoped persistent messages are published by the
+                # messages REST endpoints after commit — client relays are ignored
+                # so peers only ever see the canonical, server-built payload.
                 elif scope == "channel":
-                    channel_id = data.get("channel_id")
-                    message_data = data.get("message_data", {})
-
-                    if channel_id and message_data:
-                        # Broadcast to all connected users (they filter by channel_id on frontend)
-                        await manager.broadcast(
-                            {
-                                "type": "chat_message",
-                                "scope": "channel",
-                                **message_data,  # Full message object with id, user_id, content, etc.
-                            },
-                            server_id,
-                            websocket,
-                        )  # Exclude sender
+                    continue
 
                 elif scope == "direct":
                     target_id = data.get("target")
@@ -555,8 +651,10 @@ async def websocket_endpoint(
 
         _last_db_save.pop(user_id, None)
 
-        await zone_manager.cleanup_user(user_id)
         await manager.disconnect(websocket, server_id, user_id)
+        # A reconnect can open the new socket before this one's cleanup runs;
+        # the user's presence belongs to that socket now, so leave it in place
+        still_connected = bool(manager.server_sockets_of(server_id, user_id))
 
         if redis_client.r:
             final_pos = await redis_client.r.hgetall(f"user:{user_id}")
@@ -566,9 +664,15 @@ async def websocket_endpoint(
 
                 await save_position_to_db(last_x, last_y)
 
-        await redis_client.r.srem(f"server:{server_id}:users", user_id)
-        await redis_client.r.delete(f"user:{user_id}")
+        if not still_connected:
+            await zone_manager.cleanup_user(user_id)
+            await push_proximity_diffs(
+                server_id, await proximity_manager.remove(server_id, user_id)
+            )
+            await redis_client.r.srem(f"server:{server_id}:users", user_id)
+            await redis_client.r.delete(f"user:{user_id}")
 
-    await manager.broadcast(
-        {"type": "user_left", "user_id": user_id}, server_id, websocket
-    )
+    if not still_connected:
+        await manager.broadcast(
+            {"type": "user_left", "user_id": user_id}, server_id, websocket
+        )
@@ -0,0 +1,130 @@
+"""
+Batch Job - Shared skeleton for resumable background jobs that work through
+large row sets in short batches (dm_key_cleanup, server_purge).
+
+Each job owns a queue of item ids (a device, a server) and a single runner
+task. Subclasses say which items are unfinished (_pending_ids, used by
+resume_pending() at startup) and how to process one (_process), usually by
+calling _run_batches() for each table they touch.
+
+_run_batches() takes up to batch_size rows per transaction with SKIP LOCKED,
+so another worker resuming the same item takes different rows instead of
+waiting on ours. An empty SKIP LOCKED batch only means the rows left are
+locked, so it re-checks without SKIP LOCKED before reporting the rows done.
+"""
+
+import asyncio
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+
+# Pause between batches so a job yields to request traffic
+BATCH_PAUSE_SECONDS = 0.05
+
+
+class BatchJob:
+    # Used in failure logs, e.g. "DM key cleanup failed for <id>: ..."
+    name = "Batch job"
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queued: set[str] = set()
+        self.current_id: str | None = None
+        self.runner_task: asyncio.Task | None = None
+
+        self.batches = 0
+
+    async def start(self):
+        if self.runner_task is None:
+            self.runner_task = asyncio.create_task(self._run_loop())
+            await self.resume_pending()
+
+    async def stop(self):
+        if self.runner_task:
+            self.runner_task.cancel()
+            self.runner_task = None
+
+    def schedule(self, item_id):
+        item_id = str(item_id)
+        if item_id in self.queued:
+            return
+        self.queued.add(item_id)
+        self.queue.put_nowait(item_id)
+
+    async def resume_pending(self):
+        """Re-queues items whose job never finished."""
+        async with SessionLocal() as session:
+            for item_id in await self._pending_ids(session):
+                self.schedule(item_id)
+
+    async def _pending_ids(self, session) -> list:
+        raise NotImplementedError
+
+    async def _process(self, item_id: str):
+        raise NotImplementedError
+
+    async def _run_loop(self):
+        while True:
+            item_id = await self.queue.get()
+            self.current_id = item_id
+            try:
+                await self._process(item_id)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                # Left unfinished, so the next resume_pending() picks it up again
+                print(f"{self.name} failed for {item_id}: {e}")
+            finally:
+                self.current_id = None
+                self.queued.discard(item_id)
+
+    async def _run_batches(self, id_column, condition, build_statement):
+        """
+        Runs build_statement(batch) until no row matches condition, where
+        batch is a SKIP LOCKED subquery of up to batch_size ids. Yields each
+        committed batch's RETURNING rows, or its rowcount without RETURNING.
+        """
+        while True:
+            async with SessionLocal() as session:
+                batch = (
+                    select(id_column)
+                    .where(condition)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                    .scalar_subquery()
+                )
+                result = await session.execute(
+                    build_statement(batch).execution_options(synchronize_session=False)
+                )
+                affected = (
+                    result.scalars().all() if result.returns_rows else result.rowcount
+                )
+                if not affected and await self._rows_remain(
+                    session, id_column, condition
+                ):
+                    await session.rollback()
+                    await asyncio.sleep(BATCH_PAUSE_SECONDS)
+                    continue
+                await session.commit()
+
+            if not affected:
+                return
+            self.batches += 1
+            yield affected
+            await asyncio.sleep(BATCH_PAUSE_SECONDS)
+
+    async def _rows_remain(self, session, id_column, condition) -> bool:
+        result = await session.execute(select(id_column).where(condition).limit(1))
+        return result.first() is not None
+
+    def status_of(self, item_id) -> str:
+        return "running" if str(item_id) == self.current_id else "pending"
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+        }
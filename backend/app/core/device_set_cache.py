@@ -0,0 +1,130 @@
+"""
+Device Set Cache - Versioned, Redis-cached trusted-device set per server.
+
+The version is bumped (after commit) whenever the set can change: a device is
+trusted or soft-deleted, or a member joins, is approved, kicked, rejected or
+leaves. Snapshots are cached per version, so clients holding a version can get
+a 304 or a diff instead of the whole list.
+
+Versions are seeded from the wall clock, so they keep increasing even if Redis
+loses the key.
+"""
+
+import json
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.core.redis_client as redis_client
+from app.models.device import Device
+from app.models.server_member import MemberStatus, ServerMember
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL_SECONDS = 600
+
+
+class DeviceSetCache:
+    def _version_key(self, server_id) -> str:
+        return f"device_set_version:{server_id}"
+
+    def _snapshot_key(self, server_id, version: int) -> str:
+        return f"device_set:{server_id}:{version}"
+
+    async def get_version(self, server_id) -> int | None:
+        """Current version of the server's device set, or None without Redis."""
+        if not redis_client.r:
+            return None
+        key = self._version_key(server_id)
+        try:
+            await redis_client.r.set(key, int(time.time() * 1000), nx=True)
+            return int(await redis_client.r.get(key))
+        except Exception as e:
+            logger.warning(f"Device set version read failed: {e}")
+            return None
+
+    async def bump(self, server_ids):
+        if not redis_client.r:
+            return
+        for server_id in server_ids:
+            key = self._version_key(server_id)
+            try:
+                await redis_client.r.set(key, int(time.time() * 1000), nx=True)
+                await redis_client.r.incr(key)
+            except Exception as e:
+                logger.warning(f"Device set version bump failed: {e}")
+
+    async def bump_for_user(self, user_id, db: AsyncSession):
+        """Bumps every server the user is an accepted member of."""
+        if not redis_client.r:
+            return
+        result = await db.execute(
+            select(ServerMember.server_id).where(
+                ServerMember.user_id == user_id,
+                ServerMember.status == MemberStatus.ACCEPTED,
+            )
+        )
+        await self.bump(result.scalars().all())
+
+    async def get_device_set(
+        self, server_id, db: AsyncSession
+    ) -> tuple[int | None, list[dict]]:
+        """
+        Returns (version, [{device_id, public_key}]) for every trusted,
+        non-deleted device of the server's accepted members.
+        """
+        version = await self.get_version(server_id)
+        if version is not None:
+            snapshot = await self.get_snapshot(server_id, version)
+            if snapshot is not None:
+                return version, snapshot
+
+        devices = await self.load_device_set(server_id, db)
+
+        if version is not None:
+            try:
+                await redis_client.r.set(
+                    self._snapshot_key(server_id, version),
+                    json.dumps(devices),
+                    ex=SNAPSHOT_TTL_SECONDS,
+                )
+            except Exception as e:
+                logger.warning(f"Device set snapshot write failed: {e}")
+        return version, devices
+
+    async def load_device_set(self, server_id, db: AsyncSession) -> list[dict]:
+        """
+        Reads the device set straight from the database. Used where a stale
+        snapshot would be wrong rather than just slow (key set validation),
+        since a lost version bump can leave one cached for the full TTL.
+        """
+        result = await db.execute(
+            select(Device.id, Device.public_key)
+            .join(ServerMember, Device.user_id == ServerMember.user_id)
+            .where(
+                ServerMember.server_id == server_id,
+                ServerMember.status == MemberStatus.ACCEPTED,
+                Device.is_trusted == True,
+                Device.deleted_at == None,
+            )
+        )
+        return [
+            {"device_id": str(row.id), "public_key": row.public_key}
+            for row in result.all()
+        ]
+
+    async def get_snapshot(self, server_id, version: int) -> list[dict] | None:
+        if not redis_client.r:
+            return None
+        try:
+            cached = await redis_client.r.get(self._snapshot_key(server_id, version))
+        except Exception as e:
+            logger.warning(f"Device set snapshot read failed: {e}")
+            return None
+        return json.loads(cached) if cached is not None else None
+
+
+# Global instance
+device_set_cache = DeviceSetCache()
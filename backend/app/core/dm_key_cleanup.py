@@ -0,0 +1,104 @@
+"""
+DM Key Cleanup - Re-points a deleted device's dm_device_keys in the background.
+
+delete_device only soft-deletes the device; its ciphertext rows are tombstoned
+here (device_id=NULL, deleted_device_id=<device>) in short batches, each in its
+own transaction, so a device with millions of rows never holds long locks that
+block new DM key inserts.
+
+The job is resumable: progress is the set of rows still pointing at the device,
+and devices.dm_keys_repointed_at marks completion. Devices left unfinished by a
+restart are re-queued by resume_pending() at startup.
+"""
+
+import os
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+
+from app.core.batch_job import BatchJob
+from app.core.database import SessionLocal
+from app.models.device import Device
+from app.models.dm_device_key import DmDeviceKey
+
+BATCH_SIZE = int(os.getenv("DM_KEY_CLEANUP_BATCH_SIZE", "5000"))
+
+
+class DmKeyCleanup(BatchJob):
+    name = "DM key cleanup"
+
+    def __init__(self):
+        super().__init__(BATCH_SIZE)
+        self.rows_repointed = 0
+        self.devices_completed = 0
+
+    async def _pending_ids(self, session) -> list:
+        """Soft-deleted devices whose cleanup never finished."""
+        result = await session.execute(
+            select(Device.id).where(
+                Device.deleted_at != None,
+                Device.dm_keys_repointed_at == None,
+            )
+        )
+        return result.scalars().all()
+
+    async def _process(self, device_id: str):
+        device_id = uuid.UUID(device_id)
+
+        def repoint(batch):
+            return (
+                update(DmDeviceKey)
+                .where(DmDeviceKey.id.in_(batch))
+                .values(device_id=None, deleted_device_id=device_id)
+            )
+
+        batches = self._run_batches(
+            DmDeviceKey.id, DmDeviceKey.device_id == device_id, repoint
+        )
+        async for repointed in batches:
+            self.rows_repointed += repointed
+
+        async with SessionLocal() as session:
+            await session.execute(
+                update(Device)
+                .where(Device.id == device_id)
+                .values(dm_keys_repointed_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+        self.devices_completed += 1
+
+    async def get_progress(self, device: Device, db) -> dict:
+        remaining = 0
+        if device.dm_keys_repointed_at is None:
+            remaining = (
+                await db.execute(
+                    select(func.count())
+                    .select_from(DmDeviceKey)
+                    .where(DmDeviceKey.device_id == device.id)
+                )
+            ).scalar_one()
+
+        if device.dm_keys_repointed_at is not None:
+            status = "completed"
+        else:
+            status = self.status_of(device.id)
+
+        return {
+            "device_id": device.id,
+            "status": status,
+            "remaining_keys": remaining,
+            "completed_at": device.dm_keys_repointed_at,
+        }
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "current_device_id": self.current_id,
+            "rows_repointed": self.rows_repointed,
+            "devices_completed": self.devices_completed,
+        }
+
+
+# Global instance
+dm_key_cleanup = DmKeyCleanup()
@@ -0,0 +1,106 @@
+"""
+Epoch Cache - Shared (Redis) cache of current encryption epochs.
+Keeps epoch lookups off the database on every message send.
+
+Epochs only ever go up, so every write is "set if newer" (_SET_IF_NEWER). A
+reader refilling an epoch it loaded before a rotation committed can therefore
+never overwrite the rotated value. Writers that change an epoch must write the
+new value here after commit rather than only deleting the key.
+
+A DM rotation also deletes the pairs' keys before it commits. Otherwise, until
+the post-commit write lands, the cache would keep accepting sends encrypted
+for the old epoch. Readers that miss fall through to the database.
+"""
+
+import logging
+
+import app.core.redis_client as redis_client
+
+logger = logging.getLogger(__name__)
+
+EPOCH_CACHE_TTL_SECONDS = 300
+
+# KEYS[1] = epoch key, ARGV[1] = epoch, ARGV[2] = ttl
+_SET_IF_NEWER = """
+local current = redis.call('GET', KEYS[1])
+if current and tonumber(current) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+class EpochCache:
+    def _dm_key(self, user_a_id, user_b_id) -> str:
+        # Callers pass the canonical (smaller, larger) pair — see DmEpoch docstring
+        return f"dm_epoch:{user_a_id}:{user_b_id}"
+
+    async def get_dm_epoch(self, user_a_id, user_b_id) -> int | None:
+        if not redis_client.r:
+            return None
+        try:
+            cached = await redis_client.r.get(self._dm_key(user_a_id, user_b_id))
+        except Exception as e:
+            logger.warning(f"DM epoch cache read failed: {e}")
+            return None
+        return int(cached) if cached is not None else None
+
+    async def set_dm_epoch(self, user_a_id, user_b_id, epoch: int):
+        """Call after commit only, so a rolled-back epoch is never cached."""
+        await self.set_dm_epochs([(user_a_id, user_b_id, epoch)])
+
+    async def set_dm_epochs(self, rows):
+        """Caches (user_a_id, user_b_id, epoch) for every row given."""
+        keys = {self._dm_key(a, b): epoch for a, b, epoch in rows}
+        await self._set_if_newer(keys, "DM")
+
+    async def invalidate_dm_epochs(self, pairs):
+        """Drops the cached epoch of every (user_a_id, user_b_id, ...) row given."""
+        if not pairs or not redis_client.r:
+            return
+        try:
+            await redis_client.r.delete(*{self._dm_key(a, b) for a, b, *_ in pairs})
+        except Exception as e:
+            logger.warning(f"DM epoch cache invalidation failed: {e}")
+
+    def _channel_key(self, channel_id) -> str:
+        return f"channel_epoch:{channel_id}"
+
+    async def get_channel_epoch(self, channel_id) -> int | None:
+        """
+        Returns the cached current epoch, 0 for a channel cached as unencrypted,
+        or None on a cache miss.
+        """
+        if not redis_client.r:
+            return None
+        try:
+            cached = await redis_client.r.get(self._channel_key(channel_id))
+        except Exception as e:
+            logger.warning(f"Channel epoch cache read failed: {e}")
+            return None
+        return int(cached) if cached is not None else None
+
+    async def set_channel_epoch(self, channel_id, epoch: int):
+        """Call after commit only; 0 caches the channel as unencrypted."""
+        await self._set_if_newer({self._channel_key(channel_id): epoch}, "Channel")
+
+    async def _set_if_newer(self, epochs: dict[str, int], kind: str):
+        if not epochs or not redis_client.r:
+            return
+        try:
+            pipeline = redis_client.r.pipeline()
+            for key, epoch in epochs.items():
+                pipeline.eval(_SET_IF_NEWER, 1, key, epoch, EPOCH_CACHE_TTL_SECONDS)
+            await pipeline.execute()
+        except Exception as e:
+            logger.warning(f"{kind} epoch cache write failed: {e}")
+            # A key we failed to advance must not keep serving the old epoch
+            try:
+                await redis_client.r.delete(*epochs)
+            except Exception as e:
+                logger.warning(f"{kind} epoch cache invalidation failed: {e}")
+
+
+# Global instance
+epoch_cache = EpochCache()
@@ -0,0 +1,83 @@
+"""
+Link Events - Wakes long-polling device-linking requests.
+
+One Redis pattern subscription per worker fans published keys out to local
+asyncio waiters, so approve/reject on any worker wakes the waiting device
+immediately. Without Redis only same-worker waiters are woken; others fall
+back to their poll timeout.
+
+Keys:
+  request:{request_id}  - a link request left "pending"
+  user:{user_id}        - a new link request was created for the user
+"""
+
+import asyncio
+from contextlib import contextmanager
+
+import app.core.redis_client as redis_client
+
+CHANNEL_PREFIX = "device_link:"
+
+
+class LinkEventHub:
+    def __init__(self):
+        self.waiters: dict[str, set[asyncio.Event]] = {}
+        self.listener_task: asyncio.Task | None = None
+
+    @contextmanager
+    def listen(self, key: str):
+        """
+        Registers a waiter for key. Enter this *before* re-checking state so a
+        publish between the check and the wait is not lost.
+        """
+        event = asyncio.Event()
+        self.waiters.setdefault(key, set()).add(event)
+        try:
+            yield event
+        finally:
+            waiters = self.waiters.get(key)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self.waiters[key]
+
+    async def publish(self, key: str):
+        self._wake(key)
+        if not redis_client.r:
+            return
+        try:
+            await redis_client.r.publish(f"{CHANNEL_PREFIX}{key}", "1")
+        except Exception as e:
+            print(f"Link event publish failed (non-fatal): {e}")
+
+    def _wake(self, key: str):
+        for event in self.waiters.get(key, ()):
+            event.set()
+
+    async def start(self):
+        if redis_client.r and self.listener_task is None:
+            self.listener_task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self):
+        if self.listener_task:
+            self.listener_task.cancel()
+            self.listener_task = None
+
+    async def _listen_loop(self):
+        while True:
+            try:
+                pubsub = redis_client.r.pubsub()
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for item in pubsub.listen():
+                    if item.get("type") != "pmessage":
+                        continue
+                    self._wake(item["channel"][len(CHANNEL_PREFIX) :])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"Link event listener error, resubscribing: {e}")
+                await asyncio.sleep(1)
+
+
+# Global instance
+link_events = LinkEventHub()
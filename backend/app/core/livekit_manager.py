@@ -1,10 +1,13 @@
 import os
+import time
 import uuid
 from datetime import timedelta
 
 from dotenv import load_dotenv
 from livekit.api import AccessToken, VideoGrants
 
+from app.core.livekit_token_cache import livekit_token_cache
+
 load_dotenv()
 
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
@@ -50,6 +53,38 @@ def create_user_token(
     return token
 
 
+def get_user_token(
+    room_name: str,
+    user_id: str,
+    username: str,
+    can_publish: bool = True,
+    can_subscribe: bool = True,
+    ttl_hours: int = 1,
+) -> tuple[str, float]:
+    """
+    Cached create_user_token(). Returns (token, expires_at) and reuses a token
+    for the same claims until it nears expiry instead of re-signing every call.
+    """
+    key = (room_name, user_id, username, can_publish, can_subscribe, ttl_hours)
+    ttl_seconds = ttl_hours * 3600
+    cached = livekit_token_cache.get(key, ttl_seconds)
+    if cached is not None:
+        return cached
+
+    # Taken before signing, so it never runs past the JWT's own exp
+    expires_at = time.time() + ttl_seconds
+    token = create_user_token(
+        room_name=room_name,
+        user_id=user_id,
+        username=username,
+        can_publish=can_publish,
+        can_subscribe=can_subscribe,
+        ttl_hours=ttl_hours,
+    )
+    livekit_token_cache.set(key, token, expires_at)
+    return token, expires_at
+
+
 def create_guest_token(room_name: str, guest_label: str = "Guest") -> str:
     guest_id = f"guest_{uuid.uuid4().hex[:8]}"
     guest_name = f"{guest_label}_{uuid.uuid4().hex[:4]}"
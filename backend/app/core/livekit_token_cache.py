@@ -0,0 +1,63 @@
+"""
+LiveKit Token Cache - In-process LRU of signed LiveKit access tokens.
+
+Keyed by (room, identity, name, grants, ttl), so a token is only reused for the
+exact same claims. A token is served until less than REFRESH_MARGIN of its
+lifetime is left; LiveKit checks expiry only on connect, so a reused token
+still has ample time for the join.
+"""
+
+import time
+from collections import OrderedDict
+
+# Re-mint once less than this fraction of the token's lifetime remains
+REFRESH_MARGIN = 0.25
+
+
+class LiveKitTokenCache:
+    def __init__(self, max_entries=10_000):
+        # Cache structure: { (room, identity, name, grants..., ttl): (expires_at, jwt) }
+        # Using OrderedDict for LRU (Least Recently Used) eviction
+        self.entries: OrderedDict = OrderedDict()
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, ttl_seconds: float) -> tuple[str, float] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, token = entry
+        if expires_at - time.time() <= ttl_seconds * REFRESH_MARGIN:
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)  # Mark as recently used
+        self.hits += 1
+        return token, expires_at
+
+    def set(self, key: tuple, token: str, expires_at: float):
+        # Enforce LRU Limit
+        if key not in self.entries and len(self.entries) >= self.max_entries:
+            self.entries.popitem(last=False)
+
+        self.entries[key] = (expires_at, token)
+        self.entries.move_to_end(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Create a global instance
+livekit_token_cache = LiveKitTokenCache()
@@ -0,0 +1,184 @@
+"""
+Membership Cache - (user, server) -> {role, status} authorization lookups.
+
+Two tiers:
+  - In-process dict with a short TTL, so hot paths skip even the Redis hop.
+  - Redis, shared across workers, with a longer TTL.
+
+Writers (join / approve / reject / kick / leave / delete) must call
+invalidate() after commit. Other workers may serve a local entry for at most
+LOCAL_TTL_SECONDS after that.
+
+invalidate() bumps a per-(server, user) version instead of only deleting the
+entry. Entries carry the version they were filled under and are ignored once
+it moves, and a refill is only stored if the version is still the one read
+before the database query (_SET_IF_VERSION). A request that read "accepted"
+just before a kick committed can't re-cache the kicked user.
+"""
+
+import json
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.core.redis_client as redis_client
+from app.models.channel import Channel
+from app.models.server_member import MemberStatus, ServerMember
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TTL_SECONDS = 5
+REDIS_TTL_SECONDS = 300
+# Outlives every entry filled under it; a lapsed version only causes misses
+VERSION_TTL_SECONDS = REDIS_TTL_SECONDS * 2
+
+# KEYS[1] = entry key, KEYS[2] = version key
+# ARGV[1] = version read before the DB query, ARGV[2] = entry, ARGV[3] = ttl
+_SET_IF_VERSION = """
+local version = redis.call('GET', KEYS[2]) or '0'
+if version ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+# Stored for non-members so repeated 403s don't hit the database either
+_NOT_A_MEMBER = {}
+
+
+class MembershipCache:
+    def __init__(self, max_entries=50_000):
+        # { ("server_id", "user_id"): (expires_at, {role, status} or {}) }
+        self.local: dict[tuple[str, str], tuple[float, dict]] = {}
+        # Channels never move between servers, so this mapping needs no TTL
+        self.channel_servers: dict[str, str] = {}
+        self.max_entries = max_entries
+        # Bumped by every local invalidate(); a refill that started before the
+        # bump is not stored locally
+        self.generation = 0
+
+    def _redis_key(self, server_id: str, user_id: str) -> str:
+        return f"membership:{server_id}:{user_id}"
+
+    def _version_key(self, server_id: str, user_id: str) -> str:
+        return f"membership_version:{server_id}:{user_id}"
+
+    async def get_membership(self, server_id, user_id, db: AsyncSession) -> dict | None:
+        """Returns {"role", "status"} for the user in the server, or None."""
+        server_id, user_id = str(server_id), str(user_id)
+        cache_key = (server_id, user_id)
+
+        entry = self.local.get(cache_key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1] or None
+
+        generation = self.generation
+        membership, version = await self._get_from_redis(server_id, user_id)
+        if membership is None:
+            result = await db.execute(
+                select(ServerMember.role, ServerMember.status).where(
+                    ServerMember.server_id == server_id,
+                    ServerMember.user_id == user_id,
+                )
+            )
+            row = result.first()
+            membership = (
+                {"role": str(row.role), "status": str(row.status)}
+                if row
+                else _NOT_A_MEMBER
+            )
+            await self._set_in_redis(server_id, user_id, membership, version)
+
+        if generation == self.generation:
+            if len(self.local) >= self.max_entries:
+                self.local.clear()
+            self.local[cache_key] = (time.monotonic() + LOCAL_TTL_SECONDS, membership)
+        return membership or None
+
+    async def is_accepted_member(self, server_id, user_id, db: AsyncSession) -> bool:
+        membership = await self.get_membership(server_id, user_id, db)
+        return bool(membership) and membership["status"] == MemberStatus.ACCEPTED
+
+    async def get_channel_server_id(self, channel_id, db: AsyncSession) -> str | None:
+        channel_id = str(channel_id)
+        server_id = self.channel_servers.get(channel_id)
+        if server_id:
+            return server_id
+
+        result = await db.execute(
+            select(Channel.server_id).where(Channel.id == channel_id)
+        )
+        server_id = result.scalar()
+        if server_id is None:
+            return None
+
+        if len(self.channel_servers) >= self.max_entries:
+            self.channel_servers.clear()
+        self.channel_servers[channel_id] = str(server_id)
+        return str(server_id)
+
+    async def invalidate(self, server_id, user_id):
+        server_id, user_id = str(server_id), str(user_id)
+        self.local.pop((server_id, user_id), None)
+        self.generation += 1
+        if not redis_client.r:
+            return
+        try:
+            version_key = self._version_key(server_id, user_id)
+            pipeline = redis_client.r.pipeline()
+            pipeline.incr(version_key)
+            pipeline.expire(version_key, VERSION_TTL_SECONDS)
+            pipeline.delete(self._redis_key(server_id, user_id))
+            await pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Membership cache invalidation failed: {e}")
+
+    def forget_channel(self, channel_id):
+        self.channel_servers.pop(str(channel_id), None)
+
+    async def _get_from_redis(
+        self, server_id: str, user_id: str
+    ) -> tuple[dict | None, str | None]:
+        """Returns (membership or None on a miss, version to refill under)."""
+        if not redis_client.r:
+            return None, None
+        try:
+            cached, version = await redis_client.r.mget(
+                self._redis_key(server_id, user_id),
+                self._version_key(server_id, user_id),
+            )
+        except Exception as e:
+            logger.warning(f"Membership cache read failed: {e}")
+            return None, None
+
+        version = version or "0"
+        if cached is None:
+            return None, version
+        entry = json.loads(cached)
+        if entry.get("version") != version:
+            return None, version
+        return entry["membership"], version
+
+    async def _set_in_redis(
+        self, server_id: str, user_id: str, membership: dict, version: str | None
+    ):
+        if version is None or not redis_client.r:
+            return
+        try:
+            await redis_client.r.eval(
+                _SET_IF_VERSION,
+                2,
+                self._redis_key(server_id, user_id),
+                self._version_key(server_id, user_id),
+                version,
+                json.dumps({"version": version, "membership": membership}),
+                REDIS_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.warning(f"Membership cache write failed: {e}")
+
+
+# Global instance
+membership_cache = MembershipCache()
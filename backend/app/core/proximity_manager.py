@@ -0,0 +1,159 @@
+"""
+Proximity Manager - Maintains each user's nearby set from movement.
+
+Positions live in a uniform grid per server (cell size = LEAVE_RADIUS), so a
+move only compares the mover against users in the 3x3 block of cells around
+it instead of every avatar on the server. Nearby sets are symmetric and use
+hysteresis: a peer joins within JOIN_RADIUS and leaves beyond LEAVE_RADIUS, so
+standing on the boundary doesn't flap.
+
+Each call returns only the join/leave diffs per affected user. The sets are
+mirrored to Redis as user:{user_id}:nearby.
+"""
+
+import logging
+import math
+
+import app.core.redis_client as redis_client
+
+logger = logging.getLogger(__name__)
+
+# Tiles; JOIN_RADIUS matches the client's MAX_HEAR_RADIUS
+JOIN_RADIUS = 5
+LEAVE_RADIUS = 7
+CELL_SIZE = LEAVE_RADIUS
+
+
+class ProximityGrid:
+    def __init__(self):
+        # Grid structure: { (cell_x, cell_y): {user_id, ...} }
+        self.cells: dict[tuple[int, int], set[str]] = {}
+        self.positions: dict[str, tuple[float, float]] = {}
+        self.nearby: dict[str, set[str]] = {}
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / CELL_SIZE), math.floor(y / CELL_SIZE))
+
+    def _candidates(self, x: float, y: float):
+        cx, cy = self._cell(x, y)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                yield from self.cells.get((cx + dx, cy + dy), ())
+
+    def move(self, user_id: str, x: float, y: float) -> dict[str, tuple[set, set]]:
+        old = self.positions.get(user_id)
+        if old is not None:
+            old_cell = self._cell(*old)
+            new_cell = self._cell(x, y)
+            if old_cell != new_cell:
+                self._remove_from_cell(old_cell, user_id)
+                self.cells.setdefault(new_cell, set()).add(user_id)
+        else:
+            self.cells.setdefault(self._cell(x, y), set()).add(user_id)
+        self.positions[user_id] = (x, y)
+
+        current = self.nearby.setdefault(user_id, set())
+        updated = set()
+        for peer_id in self._candidates(x, y):
+            if peer_id == user_id:
+                continue
+            px, py = self.positions[peer_id]
+            distance = math.hypot(px - x, py - y)
+            limit = LEAVE_RADIUS if peer_id in current else JOIN_RADIUS
+            if distance <= limit:
+                updated.add(peer_id)
+
+        joined = updated - current
+        left = current - updated
+        if not joined and not left:
+            return {}
+
+        self.nearby[user_id] = updated
+        diffs = {user_id: (joined, left)}
+        for peer_id in joined:
+            self.nearby.setdefault(peer_id, set()).add(user_id)
+            diffs[peer_id] = ({user_id}, set())
+        for peer_id in left:
+            self.nearby.get(peer_id, set()).discard(user_id)
+            diffs[peer_id] = (set(), {user_id})
+        return diffs
+
+    def remove(self, user_id: str) -> dict[str, tuple[set, set]]:
+        position = self.positions.pop(user_id, None)
+        if position is not None:
+            self._remove_from_cell(self._cell(*position), user_id)
+
+        diffs = {}
+        for peer_id in self.nearby.pop(user_id, set()):
+            self.nearby.get(peer_id, set()).discard(user_id)
+            diffs[peer_id] = (set(), {user_id})
+        return diffs
+
+    def _remove_from_cell(self, cell: tuple[int, int], user_id: str):
+        users = self.cells.get(cell)
+        if users is None:
+            return
+        users.discard(user_id)
+        if not users:
+            del self.cells[cell]
+
+
+class ProximityManager:
+    def __init__(self):
+        # Grid per server: { "server_id": ProximityGrid }
+        self.grids: dict[str, ProximityGrid] = {}
+
+    async def move(self, server_id: str, user_id: str, x: float, y: float):
+        """Updates the user's position; returns {user_id: (joined, left)}."""
+        grid = self.grids.setdefault(server_id, ProximityGrid())
+        if user_id not in grid.positions and redis_client.r:
+            # Drop members left behind by a crashed worker before mirroring diffs
+            try:
+                await redis_client.r.delete(f"user:{user_id}:nearby")
+            except Exception as e:
+                logger.warning(f"Nearby set reset failed: {e}")
+
+        diffs = grid.move(user_id, x, y)
+        await self._mirror(diffs)
+        return diffs
+
+    async def remove(self, server_id: str, user_id: str):
+        grid = self.grids.get(server_id)
+        if grid is None:
+            return {}
+        diffs = grid.remove(user_id)
+        if not grid.positions:
+            del self.grids[server_id]
+
+        await self._mirror(diffs)
+        if redis_client.r:
+            try:
+                await redis_client.r.delete(f"user:{user_id}:nearby")
+            except Exception as e:
+                logger.warning(f"Nearby set cleanup failed: {e}")
+        return diffs
+
+    def get_nearby(self, server_id: str, user_id: str) -> set[str]:
+        grid = self.grids.get(server_id)
+        if grid is None:
+            return set()
+        return set(grid.nearby.get(user_id, ()))
+
+    async def _mirror(self, diffs: dict[str, tuple[set, set]]):
+        if not diffs or not redis_client.r:
+            return
+        try:
+            pipeline = redis_client.r.pipeline()
+            for user_id, (joined, left) in diffs.items():
+                key = f"user:{user_id}:nearby"
+                if joined:
+                    pipeline.sadd(key, *joined)
+                if left:
+                    pipeline.srem(key, *left)
+            await pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Nearby set mirror failed: {e}")
+
+
+# Global instance
+proximity_manager = ProximityManager()
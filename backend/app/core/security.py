@@ -3,6 +3,9 @@ from datetime import datetime, timedelta
 
 from dotenv import load_dotenv
 from jose import jwt
+from passlib.context import CryptContext
+
+from app.core.worker_pool import BoundedWorkerPool
 
 load_dotenv()
 
@@ -10,6 +13,21 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_WEEK = "2"  # 8 hours for long-lived sessions
 
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+# Argon2 takes tens of ms of CPU per call; keep it off the event loop
+password_pool = BoundedWorkerPool(
+    "password-hash", max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+)
+
+
+async def hash_password(password: str) -> str:
+    return await password_pool.run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await password_pool.run(pwd_context.verify, password, hashed_password)
+
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
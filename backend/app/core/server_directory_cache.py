@@ -0,0 +1,74 @@
+"""
+Server Directory Cache - Short-TTL Redis cache of GET /servers/ pages.
+
+Pages are cached under the directory's current version, and create, rename
+and delete bump the version, so a changed directory is never served stale;
+the TTL only bounds how long unused pages linger.
+
+Only the shared directory is cached. "Servers I'm a member of" pages are per
+user and already served by an index, so they always hit the database.
+"""
+
+import json
+import logging
+
+import app.core.redis_client as redis_client
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "server_directory_version"
+PAGE_TTL_SECONDS = 15
+
+
+class ServerDirectoryCache:
+    def _page_key(self, version: int, params: str) -> str:
+        return f"server_directory:{version}:{params}"
+
+    async def _get_version(self) -> int | None:
+        try:
+            return int(await redis_client.r.get(VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Server directory version read failed: {e}")
+            return None
+
+    async def get(self, params: str) -> tuple[int | None, dict | None]:
+        """
+        Returns (version, page). Pass the version back to set(), so a page
+        built while the directory changed is stored under the old version.
+        """
+        if not redis_client.r:
+            return None, None
+        version = await self._get_version()
+        if version is None:
+            return None, None
+        try:
+            cached = await redis_client.r.get(self._page_key(version, params))
+        except Exception as e:
+            logger.warning(f"Server directory page read failed: {e}")
+            return version, None
+        return version, json.loads(cached) if cached is not None else None
+
+    async def set(self, version: int | None, params: str, page: dict):
+        if version is None or not redis_client.r:
+            return
+        try:
+            await redis_client.r.set(
+                self._page_key(version, params),
+                json.dumps(page, default=str),
+                ex=PAGE_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.warning(f"Server directory page write failed: {e}")
+
+    async def invalidate(self):
+        """Call after commit whenever a server is created, renamed or deleted."""
+        if not redis_client.r:
+            return
+        try:
+            await redis_client.r.incr(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Server directory invalidation failed: {e}")
+
+
+# Global instance
+server_directory_cache = ServerDirectoryCache()
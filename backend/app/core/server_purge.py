@@ -0,0 +1,169 @@
+"""
+Server Purge - Deletes a soft-deleted server's rows in the background.
+
+delete_server only sets servers.deleted_at; everything that hangs off the
+server is removed here in short batches, each in its own transaction, so a
+server with millions of messages never holds one long transaction open.
+
+Order matters for the foreign keys: members go first so access is revoked
+straight away, then per channel its device keys, encryption state, reply links
+and messages, then the channels, the zones and finally the server row itself.
+
+The job is resumable: progress is the set of rows still attached to the
+server, and the server row disappearing marks completion. Servers left
+unfinished by a restart are re-queued by resume_pending() at startup.
+"""
+
+import os
+import uuid
+
+from sqlalchemy import delete, func, select, update
+
+from app.core.batch_job import BatchJob
+from app.core.database import SessionLocal
+from app.core.device_set_cache import device_set_cache
+from app.core.membership_cache import membership_cache
+from app.models.channel import Channel
+from app.models.channel_device_key import ChannelDeviceKey
+from app.models.channel_encryption import ChannelEncryption
+from app.models.message import Message
+from app.models.server import Server
+from app.models.server_member import ServerMember
+from app.models.zone import Zone
+
+BATCH_SIZE = int(os.getenv("SERVER_PURGE_BATCH_SIZE", "5000"))
+
+
+class ServerPurge(BatchJob):
+    name = "Server purge"
+
+    def __init__(self):
+        super().__init__(BATCH_SIZE)
+        # Rows deleted per table: { "messages": 123, ... }
+        self.rows_deleted: dict[str, int] = {}
+        self.servers_completed = 0
+
+    async def _pending_ids(self, session) -> list:
+        """Soft-deleted servers whose purge never finished."""
+        result = await session.execute(
+            select(Server.id).where(Server.deleted_at != None)
+        )
+        return result.scalars().all()
+
+    async def _process(self, server_id: str):
+        server_id = uuid.UUID(server_id)
+
+        await self._purge_members(server_id)
+
+        async with SessionLocal() as session:
+            channel_ids = (
+                (
+                    await session.execute(
+                        select(Channel.id).where(Channel.server_id == server_id)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+
+        for channel_id in channel_ids:
+            await self._delete_in_batches(
+                "channel_device_keys",
+                ChannelDeviceKey.id,
+                ChannelDeviceKey.channel_id == channel_id,
+            )
+            await self._delete_in_batches(
+                "channel_encryption",
+                ChannelEncryption.channel_id,
+                ChannelEncryption.channel_id == channel_id,
+            )
+            # Replies reference messages.id without a cascade; detach them so a
+            # batch never deletes a parent whose reply is in a later batch
+            await self._detach_replies(channel_id)
+            await self._delete_in_batches(
+                "messages", Message.id, Message.channel_id == channel_id
+            )
+            membership_cache.forget_channel(channel_id)
+
+        await self._delete_in_batches(
+            "channels", Channel.id, Channel.server_id == server_id
+        )
+        await self._delete_in_batches("zones", Zone.id, Zone.server_id == server_id)
+
+        async with SessionLocal() as session:
+            await session.execute(delete(Server).where(Server.id == server_id))
+            await session.commit()
+        self.servers_completed += 1
+
+    async def _purge_members(self, server_id: uuid.UUID):
+        def delete_members(batch):
+            return (
+                delete(ServerMember)
+                .where(ServerMember.id.in_(batch))
+                .returning(ServerMember.user_id)
+            )
+
+        batches = self._run_batches(
+            ServerMember.id, ServerMember.server_id == server_id, delete_members
+        )
+        async for user_ids in batches:
+            for user_id in user_ids:
+                await membership_cache.invalidate(server_id, user_id)
+            self._record("server_members", len(user_ids))
+        await device_set_cache.bump([server_id])
+
+    async def _delete_in_batches(self, table: str, id_column, condition):
+        def delete_rows(batch):
+            return delete(id_column.class_).where(id_column.in_(batch))
+
+        async for deleted in self._run_batches(id_column, condition, delete_rows):
+            self._record(table, deleted)
+
+    async def _detach_replies(self, channel_id):
+        def detach(batch):
+            return update(Message).where(Message.id.in_(batch)).values(reply_to_id=None)
+
+        batches = self._run_batches(
+            Message.id,
+            (Message.channel_id == channel_id) & (Message.reply_to_id != None),
+            detach,
+        )
+        async for _ in batches:
+            pass
+
+    def _record(self, table: str, rows: int):
+        self.rows_deleted[table] = self.rows_deleted.get(table, 0) + rows
+
+    async def get_progress(self, server: Server, db) -> dict:
+        channel_ids = select(Channel.id).where(Channel.server_id == server.id)
+        remaining = {
+            "server_members": ServerMember.server_id == server.id,
+            "channel_device_keys": ChannelDeviceKey.channel_id.in_(channel_ids),
+            "channel_encryption": ChannelEncryption.channel_id.in_(channel_ids),
+            "messages": Message.channel_id.in_(channel_ids),
+            "channels": Channel.server_id == server.id,
+            "zones": Zone.server_id == server.id,
+        }
+        for table, condition in remaining.items():
+            remaining[table] = (
+                await db.execute(select(func.count()).where(condition))
+            ).scalar_one()
+
+        return {
+            "server_id": server.id,
+            "status": self.status_of(server.id),
+            "deleted_at": server.deleted_at,
+            "remaining": remaining,
+        }
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "current_server_id": self.current_id,
+            "rows_deleted": self.rows_deleted,
+            "servers_completed": self.servers_completed,
+        }
+
+
+# Global instance
+server_purge = ServerPurge()
@@ -1,26 +1,125 @@
 import asyncio
+import json
+import uuid
 
 from fastapi import WebSocket
 
+import app.core.redis_client as redis_client
+
+# Redis pub/sub channel relaying user, server, channel and device sends (and
+# close_server()) between workers, so REST handlers reach sockets on any worker
+RELAY_CHANNEL = "ws:user_messages"
+
 
 class ConnectionManger:
     def __init__(self):
         self.active_connections: dict[str, dict[str, WebSocket]] = {}
+        # User index: { "user_id": {ws, ...} } — every socket (server, tab, device)
+        # the user has on this worker, so user-targeted sends skip the server scan
+        self.user_sockets: dict[str, set[WebSocket]] = {}
+        # Server of each socket, so per-server lookups reach every tab
+        self.socket_servers: dict[WebSocket, str] = {}
+        # Channel subscription index: { "channel_id": {ws, ws, ...} }
+        # Reverse index lets disconnect() drop a socket from every channel it joined
+        self.channel_subscriptions: dict[str, set[WebSocket]] = {}
+        self.socket_channels: dict[WebSocket, set[str]] = {}
+        # Device index: { "device_id": {ws, ...} } for per-device key delivery
+        self.device_sockets: dict[str, set[WebSocket]] = {}
+        self.socket_devices: dict[WebSocket, str] = {}
+
+        self.worker_id = uuid.uuid4().hex
+        self.relay_task: asyncio.Task | None = None
 
     async def connect(self, websocket: WebSocket, server_id: str, user_id: str):
         await websocket.accept()
         if server_id not in self.active_connections:
             self.active_connections[server_id] = {}
         self.active_connections[server_id][user_id] = websocket
+        self.user_sockets.setdefault(user_id, set()).add(websocket)
+        self.socket_servers[websocket] = server_id
 
     async def disconnect(self, websocket: WebSocket, server_id: str, user_id: str):
         if server_id in self.active_connections:
-            if user_id in self.active_connections[server_id]:
+            # A newer tab may have taken this slot; only drop our own socket
+            if self.active_connections[server_id].get(user_id) is websocket:
                 del self.active_connections[server_id][user_id]
 
             if len(self.active_connections[server_id]) == 0:
                 del self.active_connections[server_id]
 
+        sockets = self.user_sockets.get(user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.user_sockets[user_id]
+        self.socket_servers.pop(websocket, None)
+
+        for channel_id in self.socket_channels.pop(websocket, set()):
+            self._remove_channel_subscriber(channel_id, websocket)
+
+        self._unregister_device(websocket)
+
+    def server_sockets_of(self, server_id: str, user_id: str) -> list[WebSocket]:
+        """Every socket (tab) the user has open on the server on this worker."""
+        return [
+            ws
+            for ws in self.user_sockets.get(user_id, ())
+            if self.socket_servers.get(ws) == server_id
+        ]
+
+    def register_device(self, websocket: WebSocket, device_id: str):
+        self._unregister_device(websocket)
+        self.device_sockets.setdefault(device_id, set()).add(websocket)
+        self.socket_devices[websocket] = device_id
+
+    def _unregister_device(self, websocket: WebSocket):
+        device_id = self.socket_devices.pop(websocket, None)
+        if device_id is None:
+            return
+        sockets = self.device_sockets.get(device_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.device_sockets[device_id]
+
+    def subscribe_channel(self, websocket: WebSocket, channel_id: str):
+        self.channel_subscriptions.setdefault(channel_id, set()).add(websocket)
+        self.socket_channels.setdefault(websocket, set()).add(channel_id)
+
+    def unsubscribe_channel(self, websocket: WebSocket, channel_id: str):
+        self._remove_channel_subscriber(channel_id, websocket)
+        channels = self.socket_channels.get(websocket)
+        if channels is not None:
+            channels.discard(channel_id)
+            if not channels:
+                del self.socket_channels[websocket]
+
+    async def drop_channel_subscriptions(self, server_id: str, user_id: str):
+        """
+        Unsubscribes every socket the user has on the server from every
+        channel, on every worker. Call after removing a member so fan-out
+        stops at once.
+        """
+        server_id, user_id = str(server_id), str(user_id)
+        self._drop_local_channel_subscriptions(server_id, user_id)
+        await self._publish(
+            {"target": "drop_subscriptions", "server_id": server_id, "user_id": user_id}
+        )
+
+    def _drop_local_channel_subscriptions(self, server_id: str, user_id: str):
+        # Every tab, not just the newest one active_connections points at
+        for websocket in self.server_sockets_of(server_id, user_id):
+            for channel_id in self.socket_channels.pop(websocket, set()):
+                self._remove_channel_subscriber(channel_id, websocket)
+
+    def _remove_channel_subscriber(self, channel_id: str, websocket: WebSocket):
+        subscribers = self.channel_subscriptions.get(channel_id)
+        if subscribers is None:
+            return
+        subscribers.discard(websocket)
+        if not subscribers:
+            del self.channel_subscriptions[channel_id]
+
     async def send_personal_message(
         self, message: dict, server_id: str, target_user_id: str
     ):
@@ -32,10 +131,112 @@ class ConnectionManger:
                 except Exception:
                     pass
 
-    async def broadcast(self, message: dict, server_id: str, sender: WebSocket):
-        if server_id not in self.active_connections:
+    async def send_to_user(self, message: dict, target_user_id: str):
+        """
+        Delivers to every socket the user has, on every server, on every worker.
+        """
+        target_user_id = str(target_user_id)
+        self._send_to_local_user(message, target_user_id)
+        await self._publish({"user_id": target_user_id, "message": message})
+
+    async def close_server(self, server_id: str, message: dict, code: int = 4004):
+        """
+        Sends a final message to, then closes, every socket on the server on
+        every worker. Each socket's own handler runs disconnect() on close.
+        """
+        server_id = str(server_id)
+        await self._close_local_server(server_id, message, code)
+        await self._publish(
+            {
+                "target": "close_server",
+                "server_id": server_id,
+                "message": message,
+                "code": code,
+            }
+        )
+
+    async def _close_local_server(self, server_id: str, message: dict, code: int):
+        async def safe_close(ws: WebSocket):
+            try:
+                await asyncio.wait_for(ws.send_json(message), timeout=0.5)
+            except Exception:
+                pass
+            try:
+                await ws.close(code=code)
+            except Exception:
+                pass
+
+        sockets = list(self.active_connections.get(server_id, {}).values())
+        await asyncio.gather(*(safe_close(ws) for ws in sockets))
+
+    def _send_to_local_user(self, message: dict, target_user_id: str):
+        sockets = self.user_sockets.get(target_user_id)
+        if sockets:
+            self._fan_out(message, sockets)
+
+    async def _publish(self, envelope: dict):
+        """Hands a send to the other workers; they apply it in _apply_relayed()."""
+        if not redis_client.r:
             return
+        try:
+            await redis_client.r.publish(
+                RELAY_CHANNEL,
+                json.dumps({"origin": self.worker_id, **envelope}, default=str),
+            )
+        except Exception as e:
+            print(f"WS relay publish failed (non-fatal): {e}")
+
+    def _apply_relayed(self, payload: dict):
+        # Envelopes without a target are send_to_user() calls
+        target = payload.get("target", "user")
+        if target == "user":
+            self._send_to_local_user(payload["message"], payload["user_id"])
+        elif target == "server":
+            self._send_to_local_server(payload["message"], payload["server_id"])
+        elif target == "channel":
+            self._send_to_local_channel(payload["message"], payload["channel_id"])
+        elif target == "devices":
+            self._send_to_local_devices(payload["messages"])
+        elif target == "drop_subscriptions":
+            self._drop_local_channel_subscriptions(
+                payload["server_id"], payload["user_id"]
+            )
+        elif target == "close_server":
+            asyncio.create_task(
+                self._close_local_server(
+                    payload["server_id"], payload["message"], payload["code"]
+                )
+            )
+
+    async def start_relay(self):
+        """Starts applying other workers' relayed sends to local sockets."""
+        if redis_client.r and self.relay_task is None:
+            self.relay_task = asyncio.create_task(self._relay_loop())
+
+    async def stop_relay(self):
+        if self.relay_task:
+            self.relay_task.cancel()
+            self.relay_task = None
+
+    async def _relay_loop(self):
+        while True:
+            try:
+                pubsub = redis_client.r.pubsub()
+                await pubsub.subscribe(RELAY_CHANNEL)
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    payload = json.loads(item["data"])
+                    if payload.get("origin") == self.worker_id:
+                        continue
+                    self._apply_relayed(payload)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"WS relay error, resubscribing: {e}")
+                await asyncio.sleep(1)
 
+    def _fan_out(self, message: dict, targets, sender: WebSocket | None = None):
         async def safe_send(ws: WebSocket):
             try:
                 await asyncio.wait_for(ws.send_json(message), timeout=0.5)
@@ -44,9 +245,61 @@ class ConnectionManger:
             except Exception:
                 pass
 
-        for target_ws in self.active_connections[server_id].values():
+        for target_ws in list(targets):
             if target_ws != sender:
                 asyncio.create_task(safe_send(target_ws))
 
+    async def broadcast(
+        self, message: dict, server_id: str, sender: WebSocket | None = None
+    ):
+        if server_id not in self.active_connections:
+            return
+
+        self._fan_out(message, self.active_connections[server_id].values(), sender)
+
+    async def broadcast_to_server(self, server_id: str, message: dict):
+        """Delivers to every socket on the server, on every worker."""
+        server_id = str(server_id)
+        self._send_to_local_server(message, server_id)
+        await self._publish(
+            {"target": "server", "server_id": server_id, "message": message}
+        )
+
+    def _send_to_local_server(self, message: dict, server_id: str):
+        connections = self.active_connections.get(server_id)
+        if connections:
+            self._fan_out(message, connections.values())
+
+    async def send_to_devices(self, messages_by_device: dict[str, dict]):
+        """
+        Sends each connected device its own message, on every worker. Devices
+        without a socket anywhere fall back to the REST endpoints.
+        """
+        messages_by_device = {
+            str(device_id): message for device_id, message in messages_by_device.items()
+        }
+        self._send_to_local_devices(messages_by_device)
+        await self._publish({"target": "devices", "messages": messages_by_device})
+
+    def _send_to_local_devices(self, messages_by_device: dict[str, dict]):
+        for device_id, message in messages_by_device.items():
+            sockets = self.device_sockets.get(device_id)
+            if sockets:
+                self._fan_out(message, sockets)
+
+    async def broadcast_to_channel(self, channel_id: str, message: dict):
+        """Delivers to the channel's subscribers, on every worker."""
+        channel_id = str(channel_id)
+        self._send_to_local_channel(message, channel_id)
+        await self._publish(
+            {"target": "channel", "channel_id": channel_id, "message": message}
+        )
+
+    def _send_to_local_channel(self, message: dict, channel_id: str):
+        # Only sockets that subscribed to this channel receive channel events
+        subscribers = self.channel_subscriptions.get(channel_id)
+        if subscribers:
+            self._fan_out(message, subscribers)
+
 
 manager = ConnectionManger()
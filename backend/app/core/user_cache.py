@@ -0,0 +1,143 @@
+"""
+User Cache - In-process TTL'd LRU of decoded bearer token -> user snapshot.
+Lets get_current_user skip the JWT decode and the users lookup on a hit.
+
+Any endpoint that changes a user row (username, email, character,
+deactivation, password reset) must await invalidate_user() after commit. It
+drops the user's tokens on this worker and publishes the username on Redis so
+every other worker drops them too. Without Redis, other workers can serve the
+old snapshot for up to ttl_seconds, so don't add fields to the snapshot that
+authorization decisions depend on unless the writer invalidates.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import app.core.redis_client as redis_client
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+
+class UserCache:
+    def __init__(self, max_entries=10_000, ttl_seconds=60):
+        # Cache structure: { "token": (expires_at, {id, username, ...}) }
+        # Using OrderedDict for LRU (Least Recently Used) eviction
+        self.entries: OrderedDict = OrderedDict()
+        self.tokens_by_username: dict[str, set[str]] = {}
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.miss_lookup_seconds = 0.0
+
+        self.listener_task: asyncio.Task | None = None
+
+    def get(self, token: str) -> dict | None:
+        entry = self.entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, snapshot = entry
+        if expires_at <= time.time():
+            self._evict(token)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(token)  # Mark as recently used
+        self.hits += 1
+        return snapshot
+
+    def set(self, token: str, snapshot: dict, token_exp: float | None = None):
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            # Never serve a token past its own JWT expiry
+            expires_at = min(expires_at, token_exp)
+
+        # Enforce LRU Limit
+        if token not in self.entries and len(self.entries) >= self.max_entries:
+            oldest_token = next(iter(self.entries))
+            self._evict(oldest_token)
+
+        self.entries[token] = (expires_at, snapshot)
+        self.entries.move_to_end(token)
+        self.tokens_by_username.setdefault(snapshot["username"], set()).add(token)
+
+    def record_miss_lookup(self, seconds: float):
+        self.miss_lookup_seconds += seconds
+
+    async def invalidate_user(self, username: str):
+        """
+        Drops every cached token for a user, on every worker. Call after the
+        user row changes.
+        """
+        self._drop_user(username)
+        if not redis_client.r:
+            return
+        try:
+            await redis_client.r.publish(INVALIDATION_CHANNEL, username)
+        except Exception as e:
+            print(f"User cache invalidation publish failed (non-fatal): {e}")
+
+    def _drop_user(self, username: str):
+        for token in self.tokens_by_username.pop(username, set()):
+            self.entries.pop(token, None)
+
+    async def start(self):
+        """Starts applying other workers' invalidations to this worker's cache."""
+        if redis_client.r and self.listener_task is None:
+            self.listener_task = asyncio.create_task(self._listen_loop())
+
+    async def stop(self):
+        if self.listener_task:
+            self.listener_task.cancel()
+            self.listener_task = None
+
+    async def _listen_loop(self):
+        while True:
+            try:
+                pubsub = redis_client.r.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for item in pubsub.listen():
+                    if item.get("type") != "message":
+                        continue
+                    self._drop_user(item["data"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"User cache listener error, resubscribing: {e}")
+                # Entries may have missed an invalidation while unsubscribed
+                self.entries.clear()
+                self.tokens_by_username.clear()
+                await asyncio.sleep(1)
+
+    def _evict(self, token: str):
+        entry = self.entries.pop(token, None)
+        if entry is None:
+            return
+        username = entry[1]["username"]
+        tokens = self.tokens_by_username.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self.tokens_by_username[username]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_miss_lookup_ms": (
+                self.miss_lookup_seconds * 1000 / self.misses if self.misses else 0.0
+            ),
+        }
+
+
+# Create a global instance
+user_cache = UserCache()
@@ -0,0 +1,25 @@
+"""
+WebAuthn Verify - Runs py_webauthn verification off the event loop.
+
+Verifying an assertion or attestation parses CBOR and checks signatures through
+`cryptography`, which blocks the loop for the whole call. A burst of device
+approvals would otherwise stall every WebSocket on the worker.
+"""
+
+import os
+
+import webauthn
+
+from app.core.worker_pool import BoundedWorkerPool
+
+webauthn_pool = BoundedWorkerPool(
+    "webauthn-verify", max_workers=int(os.getenv("WEBAUTHN_VERIFY_WORKERS", "4"))
+)
+
+
+async def verify_authentication_response(**kwargs):
+    return await webauthn_pool.run(webauthn.verify_authentication_response, **kwargs)
+
+
+async def verify_registration_response(**kwargs):
+    return await webauthn_pool.run(webauthn.verify_registration_response, **kwargs)
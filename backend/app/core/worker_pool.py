@@ -0,0 +1,67 @@
+"""
+Worker Pool - Runs blocking, CPU-heavy calls (password hashing, signature
+verification) off the event loop.
+
+A semaphore caps how many calls run at once, so a burst queues here instead of
+starving the thread pool. Queue and run times are recorded for stats().
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BoundedWorkerPool:
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self.semaphore = asyncio.Semaphore(max_workers)
+
+        self.calls = 0
+        self.waiting = 0
+        self.running = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        queue_time = started_at - queued_at
+        self.queue_seconds += queue_time
+        self.max_queue_seconds = max(self.max_queue_seconds, queue_time)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.running -= 1
+            self.calls += 1
+            self.run_seconds += time.perf_counter() - started_at
+            self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "running": self.running,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "avg_queue_ms": (
+                self.queue_seconds * 1000 / self.calls if self.calls else 0.0
+            ),
+            "max_queue_ms": self.max_queue_seconds * 1000,
+            "avg_run_ms": self.run_seconds * 1000 / self.calls if self.calls else 0.0,
+        }
@@ -20,7 +20,12 @@ from app.api import (
     ws,
 )
 from app.core.database import engine
+from app.core.dm_key_cleanup import dm_key_cleanup
+from app.core.link_events import link_events
 from app.core.redis_client import close_redis, init_redis
+from app.core.server_purge import server_purge
+from app.core.socket_manager import manager
+from app.core.user_cache import user_cache
 
 load_dotenv()
 
@@ -44,7 +49,24 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"❌ Redis Error: {e}")
 
+    await manager.start_relay()
+    await link_events.start()
+    await user_cache.start()
+    try:
+        await dm_key_cleanup.start()
+    except Exception as e:
+        print(f"❌ DM key cleanup resume failed: {e}")
+    try:
+        await server_purge.start()
+    except Exception as e:
+        print(f"❌ Server purge resume failed: {e}")
+
     yield
+    await server_purge.stop()
+    await dm_key_cleanup.stop()
+    await user_cache.stop()
+    await link_events.stop()
+    await manager.stop_relay()
     await close_redis()
     print("🛑 Shutdown complete")
 
@@ -63,6 +85,7 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
@@ -1,7 +1,15 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, UniqueConstraint
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -65,4 +73,7 @@ class ChannelDeviceKey(Base):
         UniqueConstraint(
             "channel_id", "device_id", "epoch", name="uq_channel_device_epoch"
         ),
+        # Epoch-ordered scans for entitled-epochs (DISTINCT ON epoch, epoch ranges).
+        # Exact (channel_id, device_id, epoch) lookups use the unique constraint.
+        Index("ix_channel_device_keys_channel_epoch", "channel_id", "epoch"),
     )
@@ -45,6 +45,9 @@ class Device(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # Set once dm_key_cleanup has tombstoned every dm_device_keys row of this
+    # deleted device; NULL with deleted_at set means cleanup is still pending
+    dm_keys_repointed_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="devices")
@@ -71,4 +74,6 @@ class Device(Base):
             "user_id",
             postgresql_where="is_trusted = true",
         ),
+        # Matches re-registered devices by public key (channel key fallback lookups)
+        Index("ix_devices_user_public_key", "user_id", "public_key"),
     )
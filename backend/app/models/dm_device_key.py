@@ -33,7 +33,7 @@ class DmDeviceKey(Base):
     These situations require entirely different UI messages. CASCADE permanently
     collapses both into identical nulls, destroying the information forever.
 
-    When a device is deleted, a cleanup job must:
+    When a device is deleted, app/core/dm_key_cleanup.py runs, in batches:
       UPDATE dm_device_keys
       SET device_id = NULL, deleted_device_id = <deleted device's id>
       WHERE device_id = <deleted device's id>
@@ -51,10 +51,12 @@ class DmDeviceKey(Base):
     )
 
     # SET NULL — see docstring above. This FK intentionally does not cascade.
+    # Indexed so per-device ciphertext lookups and cleanup batches avoid a scan
     device_id = Column(
         UUID(as_uuid=True),
         ForeignKey("devices.id", ondelete="SET NULL"),
         nullable=True,
+        index=True,
     )
 
     # Populated by a cleanup job when device_id is set to NULL after device deletion.
@@ -18,7 +18,9 @@ class Message(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
-    channel_id = Column(UUID(as_uuid=True), ForeignKey("channels.id"), nullable=False)
+    channel_id = Column(
+        UUID(as_uuid=True), ForeignKey("channels.id"), nullable=False, index=True
+    )
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     content = Column(
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -23,6 +23,8 @@ class Server(Base):
     map_config = Column(JSONB)
     created_at = Column(DateTime, default=datetime.utcnow)
     access_type = Column(String, default=ServerAccessType.PUBLIC)
+    # Set by delete_server; the row itself is removed once the purge finishes
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     owner = relationship("User", back_populates="owned_servers")
     zones = relationship("Zone", back_populates="server")
@@ -32,3 +34,8 @@ class Server(Base):
     channels = relationship(
         "Channel", back_populates="server", cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        # Keyset pagination of the server directory (newest first)
+        Index("ix_servers_created_at_id", "created_at", "id"),
+    )
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -40,3 +40,8 @@ class ServerMember(Base):
 
     user = relationship("User", back_populates="memberships")
     server = relationship("Server", back_populates="members")
+
+    __table_args__ = (
+        # "Servers I'm a member of" and per-user membership lookups
+        Index("ix_server_members_user_id", "user_id"),
+    )
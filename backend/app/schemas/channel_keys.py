@@ -15,3 +15,14 @@ class DistributeKeyRequest(BaseModel):
     target_device_id: str
     epoch: int
     encrypted_channel_key: str
+
+
+class BulkDistributeKeyItem(BaseModel):
+    channel_id: str
+    epoch: int
+    encrypted_channel_key: str
+
+
+class BulkDistributeKeyRequest(BaseModel):
+    target_device_id: str
+    keys: list[BulkDistributeKeyItem]
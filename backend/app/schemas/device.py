@@ -29,3 +29,19 @@ class MyDeviceResponse(BaseModel):
 class PublicDeviceResponse(BaseModel):
     device_id: uuid.UUID
     public_key: str
+
+
+class DmKeyCleanupResponse(BaseModel):
+    device_id: uuid.UUID
+    # "pending" | "running" (on the worker answering) | "completed"
+    status: str
+    remaining_keys: int
+    completed_at: datetime | None
+
+
+class DeviceSetDiffResponse(BaseModel):
+    version: int | None
+    # full=True means since_version was unknown and "added" is the whole set
+    full: bool
+    added: list[PublicDeviceResponse]
+    removed: list[uuid.UUID]
@@ -20,6 +20,20 @@ class DeviceCiphertextSubmission(BaseModel):
     device_ciphertexts: list[DeviceCiphertextItem]
 
 
+class EncryptedDirectMessageCreate(BaseModel):
+    id: UUID  # client-generated, doubles as the HKDF salt
+    receiver_id: UUID
+    sender_device_id: UUID
+    epoch: int
+    content: str = "[encrypted]"
+    device_ciphertexts: list[DeviceCiphertextItem]
+
+
+class MyCiphertextBatchRequest(BaseModel):
+    device_id: UUID
+    message_ids: list[UUID]
+
+
 class DirectMessageResponse(BaseModel):
     id: UUID
     sender_id: UUID
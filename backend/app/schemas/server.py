@@ -27,3 +27,12 @@ class ServerResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ServerDeletionResponse(BaseModel):
+    server_id: UUID
+    # "pending" | "running" (on the worker answering)
+    status: str
+    deleted_at: datetime
+    # Rows still attached to the server, per table
+    remaining: dict[str, int]
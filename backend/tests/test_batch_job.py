@@ -0,0 +1,98 @@
+"""
+Tests for the shared SKIP LOCKED batching in app.core.batch_job.
+
+Sessions are scripted: each returns one batch result, then answers the
+"do rows remain" check, so the tests cover when a job may call an item done.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete
+
+import app.core.batch_job as batch_job
+from app.core.batch_job import BatchJob
+from app.models.server_member import ServerMember
+
+SERVER = uuid.uuid4()
+
+
+class FakeResult:
+    def __init__(self, rowcount=0, remaining=False):
+        self.rowcount = rowcount
+        self.returns_rows = False
+        self.remaining = remaining
+
+    def first(self):
+        return object() if self.remaining else None
+
+
+class ScriptedSession:
+    """One transaction: a batch of `affected` rows, then the remaining check."""
+
+    def __init__(self, log, affected, remaining):
+        self.log = log
+        self.results = [FakeResult(rowcount=affected), FakeResult(remaining=remaining)]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        return self.results.pop(0)
+
+    async def commit(self):
+        self.log.append("commit")
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+
+@pytest.fixture
+def script(monkeypatch):
+    log = []
+    steps = []
+
+    def session_factory():
+        affected, remaining = steps.pop(0)
+        return ScriptedSession(log, affected, remaining)
+
+    monkeypatch.setattr(batch_job, "SessionLocal", session_factory)
+    monkeypatch.setattr(batch_job, "BATCH_PAUSE_SECONDS", 0)
+    return steps, log
+
+
+async def _collect(job):
+    def build(batch):
+        return delete(ServerMember).where(ServerMember.id.in_(batch))
+
+    return [
+        affected
+        async for affected in job._run_batches(
+            ServerMember.id, ServerMember.server_id == SERVER, build
+        )
+    ]
+
+
+def test_runs_batches_until_no_rows_match(script):
+    steps, log = script
+    steps.extend([(5, False), (3, False), (0, False)])
+    job = BatchJob(batch_size=5)
+
+    assert asyncio.run(_collect(job)) == [5, 3]
+    assert job.batches == 2
+    assert log == ["commit", "commit", "commit"]
+
+
+def test_empty_skip_locked_batch_retries_while_rows_are_locked(script):
+    steps, log = script
+    # Another worker holds the last rows for two rounds, then commits them
+    steps.extend([(0, True), (0, True), (0, False)])
+    job = BatchJob(batch_size=5)
+
+    assert asyncio.run(_collect(job)) == []
+    assert log == ["rollback", "rollback", "commit"]
+    assert not steps
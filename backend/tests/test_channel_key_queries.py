@@ -0,0 +1,91 @@
+"""
+Query-count regression tests for enabling and rotating channel encryption.
+
+Every member device's wrapped key goes in one multi-row INSERT, so a channel
+with 64 devices costs the same statements as one with 2.
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql.dml import Insert
+
+from app.api.channel_keys import enable_channel_encryption, rotate_channel_key
+from app.schemas.channel_keys import EnableEncryptionRequest
+
+OWNER = SimpleNamespace(id=uuid.uuid4())
+OWNER_DEVICE = SimpleNamespace(id=uuid.uuid4(), public_key="owner-pk")
+CHANNEL_ID = str(uuid.uuid4())
+
+
+def _call(recording_session, handler, device_count, encryption=None):
+    Result = recording_session.Result
+    device_ids = [str(uuid.uuid4()) for _ in range(device_count)]
+    channel = SimpleNamespace(id=CHANNEL_ID, server_id=uuid.uuid4())
+
+    def respond(statement, params):
+        sql = str(statement)
+        if isinstance(statement, Insert):
+            return None
+        if "FROM channels JOIN servers" in sql:
+            return Result(value=channel)
+        if "FROM devices JOIN server_members" in sql:
+            return Result(
+                rows=[
+                    SimpleNamespace(id=device_id, public_key="pk")
+                    for device_id in device_ids
+                ]
+            )
+        if "FROM devices" in sql:
+            return Result(value=OWNER_DEVICE)
+        if "FROM channel_encryption" in sql:
+            return Result(value=encryption)
+        raise AssertionError(f"unexpected statement: {sql}")
+
+    session = recording_session(respond)
+    request = EnableEncryptionRequest(
+        submitting_device_id=str(OWNER_DEVICE.id),
+        encrypted_keys=[
+            {"device_id": device_id, "encrypted_channel_key": "wrapped"}
+            for device_id in device_ids
+        ],
+    )
+    asyncio.run(
+        handler(channel_id=CHANNEL_ID, req=request, current_user=OWNER, db=session)
+    )
+    return session
+
+
+def _inserted_rows(session):
+    return [
+        params
+        for statement, params in zip(session.statements, session.params, strict=True)
+        if isinstance(statement, Insert)
+    ]
+
+
+@pytest.mark.parametrize("device_count", [2, 16, 64])
+def test_enable_costs_constant_statements(recording_session, device_count):
+    session = _call(recording_session, enable_channel_encryption, device_count)
+
+    # Channel, owner device, live device set, existing encryption, INSERT
+    assert len(session.statements) == 5
+    inserts = _inserted_rows(session)
+    assert len(inserts) == 1
+    assert len(inserts[0]) == device_count
+
+
+@pytest.mark.parametrize("device_count", [2, 16, 64])
+def test_rotate_costs_constant_statements(recording_session, device_count):
+    encryption = SimpleNamespace(current_epoch=3)
+    session = _call(
+        recording_session, rotate_channel_key, device_count, encryption=encryption
+    )
+
+    assert len(session.statements) == 5
+    inserts = _inserted_rows(session)
+    assert len(inserts) == 1
+    assert {row["epoch"] for row in inserts[0]} == {4}
+    assert len(inserts[0]) == device_count
@@ -0,0 +1,64 @@
+"""
+Query-count regression tests for attaching DM device ciphertexts.
+
+Validation and the insert must each stay one statement, so a message sent to
+64 devices costs the same round trips as one sent to 2.
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.sql.dml import Insert
+
+from app.api.direct_messages import submit_device_keys
+from app.schemas.direct_message import DeviceCiphertextSubmission
+
+ME = uuid.uuid4()
+PEER = uuid.uuid4()
+
+
+def _submit(recording_session, device_count):
+    Result = recording_session.Result
+    message = SimpleNamespace(id=uuid.uuid4(), sender_id=ME, receiver_id=PEER)
+    device_ids = [uuid.uuid4() for _ in range(device_count)]
+
+    def respond(statement, params):
+        if isinstance(statement, Insert):
+            return None
+        if "FROM devices" in str(statement):
+            return Result(rows=device_ids)
+        return Result(value=message)
+
+    session = recording_session(respond)
+    payload = DeviceCiphertextSubmission(
+        device_ciphertexts=[
+            {"device_id": device_id, "encrypted_ciphertext": "ct"}
+            for device_id in device_ids
+        ]
+    )
+    asyncio.run(
+        submit_device_keys(
+            message_id=message.id,
+            payload=payload,
+            db=session,
+            current_user=SimpleNamespace(id=ME),
+        )
+    )
+    return session
+
+
+@pytest.mark.parametrize("device_count", [2, 16, 64])
+def test_submission_costs_constant_statements(recording_session, device_count):
+    session = _submit(recording_session, device_count)
+
+    # Message lookup, one device validation query, one multi-row INSERT
+    assert len(session.statements) == 3
+    inserts = [
+        params
+        for statement, params in zip(session.statements, session.params, strict=True)
+        if isinstance(statement, Insert)
+    ]
+    assert len(inserts) == 1
+    assert len(inserts[0]) == device_count
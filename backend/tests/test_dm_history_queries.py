@@ -0,0 +1,124 @@
+"""
+Query-count regression tests for the DM history and edit endpoints.
+
+The handlers are called directly with a session that records every statement,
+so a page must cost the same number of statements whatever its size.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy.sql.dml import Update
+
+from app.api.direct_messages import get_conversation_messages, update_direct_message
+from app.schemas.direct_message import DirectMessageUpdate
+
+ME = uuid.uuid4()
+PEER = uuid.uuid4()
+DEVICE = uuid.uuid4()
+
+
+def _responder(Result, history_rows=(), message=None):
+    def respond(statement, params):
+        sql = str(statement)
+        if isinstance(statement, Update):
+            unread = [
+                row.DirectMessage.id
+                for row in history_rows
+                if row.DirectMessage.sender_id == PEER
+            ]
+            return Result(rows=unread)
+        if "dm_device_keys" in sql:
+            return Result(rows=history_rows)
+        if "FROM devices" in sql:
+            return Result(value=SimpleNamespace(id=DEVICE))
+        if "FROM direct_messages" in sql:
+            return Result(value=message)
+        return Result(value="peer")
+
+    return respond
+
+
+def _message(sender_id, receiver_id):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        sender_id=sender_id,
+        receiver_id=receiver_id,
+        content="hi",
+        is_encrypted=False,
+        epoch=None,
+        sender_device_id=None,
+        edited_at=None,
+        is_deleted=False,
+        is_read=False,
+        read_at=None,
+        created_at=datetime.utcnow(),
+    )
+
+
+def _history_row(sender_id, receiver_id):
+    return SimpleNamespace(
+        DirectMessage=_message(sender_id, receiver_id),
+        sender_username="sender",
+        receiver_username="receiver",
+        encrypted_ciphertext=None,
+        ciphertext_active_device=None,
+        deleted_device_id=None,
+        sender_public_key=None,
+    )
+
+
+def _fetch_history(recording_session, page_size):
+    rows = [
+        _history_row(PEER, ME) if i % 2 else _history_row(ME, PEER)
+        for i in range(page_size)
+    ]
+    session = recording_session(_responder(recording_session.Result, rows))
+    messages = asyncio.run(
+        get_conversation_messages(
+            user_id=PEER,
+            device_id=DEVICE,
+            limit=page_size,
+            before=None,
+            db=session,
+            current_user=SimpleNamespace(id=ME),
+        )
+    )
+    return session, messages
+
+
+def test_history_page_costs_constant_statements(recording_session):
+    small, _ = _fetch_history(recording_session, 1)
+    large, _ = _fetch_history(recording_session, 100)
+
+    # Device check, joined history query, mark-read UPDATE
+    assert len(small.statements) == 3
+    assert len(large.statements) == len(small.statements)
+
+
+def test_history_reports_messages_it_marked_read(recording_session):
+    _, messages = _fetch_history(recording_session, 10)
+
+    for message in messages:
+        received = message["sender_id"] == PEER
+        assert message["is_read"] is received
+        assert (message["read_at"] is not None) is received
+
+
+def test_edit_costs_constant_statements(recording_session):
+    message = _message(ME, PEER)
+    session = recording_session(_responder(recording_session.Result, message=message))
+    response = asyncio.run(
+        update_direct_message(
+            message_id=message.id,
+            message_update=DirectMessageUpdate(content="edited"),
+            db=session,
+            current_user=SimpleNamespace(id=ME, username="me"),
+        )
+    )
+
+    # Message lookup and the receiver's username
+    assert len(session.statements) == 2
+    assert response.receiver_username == "peer"
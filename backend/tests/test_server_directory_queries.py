@@ -0,0 +1,92 @@
+"""
+Pagination tests for the server directory (GET /servers/).
+
+The session serves a sorted in-memory directory and answers each page from
+the keyset bounds bound into the statement, the way Postgres would use
+ix_servers_created_at_id. Walking 10k and 100k servers must return each one
+exactly once, newest first, at one statement per page and without OFFSET.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+
+from app.api.servers import MAX_SERVER_PAGE, get_servers
+
+START = datetime(2026, 1, 1)
+
+
+def _directory(size):
+    servers = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"server-{i}",
+            owner_id=uuid.uuid4(),
+            # Pairs share a timestamp so the id tiebreak is exercised
+            created_at=START + timedelta(seconds=i // 2),
+            access_type="public",
+            map_config=None,
+        )
+        for i in range(size)
+    ]
+    servers.sort(key=lambda s: (s.created_at, s.id), reverse=True)
+    return servers
+
+
+async def _walk(recording_session, servers):
+    Result = recording_session.Result
+    position = {s.id: i for i, s in enumerate(servers)}
+
+    def respond(statement, params):
+        compiled = statement.compile()
+        # Keyset paging only; an OFFSET scan grows with every page
+        assert "OFFSET" not in compiled.string
+        bound = compiled.params.values()
+        limit = next(v for v in bound if isinstance(v, int))
+        after = [v for v in bound if isinstance(v, (datetime, uuid.UUID))]
+        start = 0
+        if after:
+            # Keyset bound: rows strictly below (created_at, id), i.e. the
+            # ones after the cursor's server in the sorted directory
+            created_at, server_id = after
+            assert servers[position[server_id]].created_at == created_at
+            start = position[server_id] + 1
+        return Result(
+            rows=[
+                SimpleNamespace(Server=s, owner_username="owner")
+                for s in servers[start : start + limit]
+            ]
+        )
+
+    session = recording_session(respond)
+    seen = []
+    cursor = None
+    while True:
+        response = Response()
+        page = await get_servers(
+            response=response,
+            limit=MAX_SERVER_PAGE,
+            cursor=cursor,
+            member=False,
+            public=False,
+            db=session,
+            current_user=SimpleNamespace(id=uuid.uuid4()),
+        )
+        seen.extend(server["id"] for server in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return session, seen
+
+
+@pytest.mark.parametrize("size", [10_000, 100_000])
+def test_directory_walk_is_keyset_paged(recording_session, size):
+    servers = _directory(size)
+    session, seen = asyncio.run(_walk(recording_session, servers))
+
+    assert seen == [str(s.id) for s in servers]
+    # One statement per page
+    assert len(session.statements) == -(-size // MAX_SERVER_PAGE)
@@ -0,0 +1,115 @@
+"""
+Concurrency tests for BoundedWorkerPool and the pools built on it.
+
+Blocking calls must run at most max_workers at a time and must leave the event
+loop free to serve other coroutines while they run.
+"""
+
+import asyncio
+import threading
+import time
+
+import webauthn
+
+import app.core.security as security
+import app.core.webauthn_verify as webauthn_verify
+from app.core.worker_pool import BoundedWorkerPool
+
+CALL_SECONDS = 0.05
+
+
+class ConcurrencyProbe:
+    """A blocking call that records how many copies of it run at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(CALL_SECONDS)
+        with self.lock:
+            self.running -= 1
+        return kwargs or args
+
+
+async def _max_loop_lag(work) -> float:
+    """Runs work() while ticking the loop; returns the longest tick delay."""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    try:
+        await work()
+    finally:
+        done = True
+        await tick
+    return lag
+
+
+def test_pool_caps_concurrency_and_keeps_loop_responsive():
+    pool = BoundedWorkerPool("test", max_workers=2)
+    probe = ConcurrencyProbe()
+
+    async def burst():
+        await asyncio.gather(*(pool.run(probe, i) for i in range(8)))
+
+    lag = asyncio.run(_max_loop_lag(burst))
+
+    assert probe.peak == 2
+    assert pool.stats()["calls"] == 8
+    assert pool.stats()["running"] == 0
+    assert pool.stats()["waiting"] == 0
+    # Eight calls over two workers wait their turn in the pool...
+    assert pool.stats()["max_queue_ms"] >= CALL_SECONDS * 1000
+    # ...while the loop keeps ticking; inline they'd block it for ~400 ms
+    assert lag < CALL_SECONDS
+
+
+def test_password_hashing_runs_on_its_pool(monkeypatch):
+    pool = BoundedWorkerPool("password-hash", max_workers=2)
+    monkeypatch.setattr(security, "password_pool", pool)
+
+    async def hash_and_verify():
+        hashes = await asyncio.gather(
+            *(security.hash_password(f"password-{i}") for i in range(4))
+        )
+        assert await security.verify_password("password-0", hashes[0])
+        assert not await security.verify_password("wrong", hashes[0])
+
+    asyncio.run(hash_and_verify())
+
+    assert pool.stats()["calls"] == 6
+
+
+def test_webauthn_verification_uses_its_own_pool(monkeypatch):
+    pool = BoundedWorkerPool("webauthn-verify", max_workers=2)
+    password_pool = BoundedWorkerPool("password-hash", max_workers=2)
+    probe = ConcurrencyProbe()
+    monkeypatch.setattr(webauthn_verify, "webauthn_pool", pool)
+    monkeypatch.setattr(security, "password_pool", password_pool)
+    monkeypatch.setattr(webauthn, "verify_authentication_response", probe)
+    monkeypatch.setattr(webauthn, "verify_registration_response", probe)
+
+    async def approvals():
+        await asyncio.gather(
+            *(webauthn_verify.verify_authentication_response(i=i) for i in range(4)),
+            *(webauthn_verify.verify_registration_response(i=i) for i in range(2)),
+        )
+
+    lag = asyncio.run(_max_loop_lag(approvals))
+
+    assert probe.peak == 2
+    assert pool.stats()["calls"] == 6
+    assert password_pool.stats()["calls"] == 0
+    assert lag < CALL_SECONDS
@@ -2,6 +2,7 @@
 
 import { useEffect, useState, useCallback } from "react";
 import { fetchAPI } from "@/lib/api";
+import { fetchMyServers, fetchServerPage } from "@/lib/serverDirectory";
 import { Card, CardContent } from "@/components/ui/card";
 import { CreateServerDialog } from "@/components/dashboard/create-server-dialog";
 import { Button } from "@/components/ui/button";
@@ -53,6 +54,9 @@ type ActiveTab = "all" | "yours";
 export default function DashboardPage() {
   const router = useRouter();
   const [servers, setServers] = useState<ServerData[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [myServers, setMyServers] = useState<ServerData[]>([]);
   const [userId, setUserId] = useState("");
   const [activeTab, setActiveTab] = useState<ActiveTab>("all");
   const [searchQuery, setSearchQuery] = useState("");
@@ -65,13 +69,32 @@ export default function DashboardPage() {
 
   const loadServers = useCallback(async () => {
     try {
-      const data = await fetchAPI("/servers/");
-      if (Array.isArray(data)) setServers(data);
+      const [page, mine] = await Promise.all([
+        fetchServerPage<ServerData>(),
+        fetchMyServers<ServerData>(),
+      ]);
+      setServers(page.servers);
+      setNextCursor(page.nextCursor);
+      setMyServers(mine);
     } catch {
       toast.error("Failed to load servers");
     }
   }, []);
 
+  const loadMoreServers = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchServerPage<ServerData>({ cursor: nextCursor });
+      setServers((prev) => [...prev, ...page.servers]);
+      setNextCursor(page.nextCursor);
+    } catch {
+      toast.error("Failed to load servers");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     setUserId(localStorage.getItem("user_id") || "");
     loadServers();
@@ -185,8 +208,8 @@ export default function DashboardPage() {
       (s.owner_username ?? "").toLowerCase().includes(q)
     );
   });
-  const ownedServers = servers.filter((s) => s.owner_id === userId);
-  const joinedServers = servers.filter((s) => s.owner_id !== userId);
+  const ownedServers = myServers.filter((s) => s.owner_id === userId);
+  const joinedServers = myServers.filter((s) => s.owner_id !== userId);
 
   return (
     <div className="w-full px-6 py-8 space-y-8">
@@ -246,6 +269,19 @@ export default function DashboardPage() {
               ))}
             </div>
           )}
+
+          {nextCursor && (
+            <div className="flex justify-center">
+              <Button
+                variant="neutral"
+                className="font-bold"
+                disabled={loadingMore}
+                onClick={loadMoreServers}
+              >
+                {loadingMore ? "Loading…" : "Load more servers"}
+              </Button>
+            </div>
+          )}
         </div>
       )}
 
@@ -78,6 +78,7 @@ export function ManageMembersDialog({ serverId }: ManageMembersDialogProps) {
           toast.info("Rotating E2EE channel keys for the new member...");
           const encryptedChannelIds = await getMyEncryptedChannelIds();
           await rotateEncryptedChannels(
+            serverId,
             encryptedChannelIds,
             "Channel keys rotated for the new member.",
           );
@@ -89,6 +90,7 @@ export function ManageMembersDialog({ serverId }: ManageMembersDialogProps) {
             `/channel-keys/server/${serverId}/user/${userId}/encrypted-channels`,
           );
           await rotateEncryptedChannels(
+            serverId,
             affectedChannelIds,
             "Channel keys successfully rotated.",
           );
@@ -119,6 +121,7 @@ export function ManageMembersDialog({ serverId }: ManageMembersDialogProps) {
 
       toast.info("Rekeying encrypted channels for all current members...");
       await rotateEncryptedChannels(
+        serverId,
         encryptedChannelIds,
         "Encrypted channels rekeyed for all current members.",
       );
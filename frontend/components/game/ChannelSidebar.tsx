@@ -105,6 +105,7 @@ export function ChannelSidebar({
             "Member left. Auto-rotating E2EE keys to secure channels...",
           );
           await rotateEncryptedChannels(
+            serverId,
             encryptedChannelIds,
             "Auto-rotated due to member departure",
           );
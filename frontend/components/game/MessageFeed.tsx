@@ -7,6 +7,7 @@ import { Input } from "@/components/ui/input";
 import { Hash, Send, Edit2, Trash2 } from "lucide-react";
 import EventBus from "@/game/EventBus";
 import { fetchAPI } from "@/lib/api";
+import { wsService } from "@/lib/services/websocket.service";
 import { formatChatTimestamp } from "@/lib/time";
 import { useChannelKeys } from "@/hooks/useChannelKeys";
 import { toast } from "sonner";
@@ -89,6 +90,19 @@ export function MessageFeed({ channelId, channelName }: MessageFeedProps) {
     };
   }, [channelId, decryptForChannel]);
 
+  // Only subscribed sockets receive this channel's events from the backend
+  useEffect(() => {
+    const subscribe = () =>
+      wsService.send({ type: "channel_subscribe", channel_id: channelId });
+
+    subscribe();
+    EventBus.on("ws:connected", subscribe);
+    return () => {
+      EventBus.off("ws:connected", subscribe);
+      wsService.send({ type: "channel_unsubscribe", channel_id: channelId });
+    };
+  }, [channelId]);
+
   useEffect(() => {
     if (scrollRef.current) {
       scrollRef.current.scrollTop = scrollRef.current.scrollHeight;
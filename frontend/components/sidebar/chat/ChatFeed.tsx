@@ -9,6 +9,7 @@ import { messagesAPI, directMessagesAPI } from "@/lib/services/api.service";
 import { toast } from "sonner";
 import { formatChatTimestamp } from "@/lib/time";
 import EventBus from "@/game/EventBus";
+import { wsService } from "@/lib/services/websocket.service";
 import type { Message, DirectMessage } from "@/types/api.types";
 import { useDMKeys } from "@/hooks/useDMKeys";
 import { useChannelKeys } from "@/hooks/useChannelKeys";
@@ -18,6 +19,11 @@ import { resolveTrustedLocalDevice } from "@/lib/trustedDevice";
 // Union type for messages that can be either channel messages or DMs
 type ChatMessage = Message | DirectMessage;
 
+// How long dm_received events are buffered before one batch ciphertext fetch
+const DM_BATCH_WINDOW_MS = 50;
+// Matches MAX_BATCH_CIPHERTEXTS on the backend
+const DM_CIPHERTEXT_BATCH_SIZE = 100;
+
 interface ChatFeedProps {
   mode: "channel" | "dm";
   channelId?: string;
@@ -134,13 +140,26 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
     }
   }, [messages]);
 
-  // Listen for real-time messages from WebSocket
+  // Subscribe this socket to the open channel so the backend only fans out
+  // channel events to clients that are actually viewing it.
   useEffect(() => {
-    const handleChannelMessage = async (msg: ChatMessage) => {
-      if (!("channel_id" in msg)) return;
-      if (msg.channel_id !== channelId || msg.user_id === currentUserId) return;
+    if (mode !== "channel" || !channelId) return;
 
-      const hydratedMsg = { ...msg } as Message;
+    const subscribe = () =>
+      wsService.send({ type: "channel_subscribe", channel_id: channelId });
+
+    subscribe();
+    EventBus.on("ws:connected", subscribe);
+    return () => {
+      EventBus.off("ws:connected", subscribe);
+      wsService.send({ type: "channel_unsubscribe", channel_id: channelId });
+    };
+  }, [mode, channelId]);
+
+  // Listen for real-time messages from WebSocket
+  useEffect(() => {
+    const hydrateChannelMessage = async (msg: Message): Promise<Message> => {
+      const hydratedMsg = { ...msg, decryptedContent: undefined } as Message;
       if (
         hydratedMsg.is_encrypted &&
         hydratedMsg.content &&
@@ -163,68 +182,92 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
           }
         }
       }
+      return hydratedMsg;
+    };
 
+    const handleChannelMessage = async (msg: ChatMessage) => {
+      if (!("channel_id" in msg)) return;
+      if (msg.channel_id !== channelId || msg.user_id === currentUserId) return;
+
+      const hydratedMsg = await hydrateChannelMessage(msg as Message);
       setMessages((prev) => {
         if (prev.some((m) => m.id === hydratedMsg.id)) return prev;
         return [...prev, hydratedMsg];
       });
     };
 
-    const handleDMReceived = async (msg: ChatMessage) => {
-      if (
-        "sender_id" in msg &&
-        (msg.sender_id === dmUserId || msg.receiver_id === dmUserId)
-      ) {
-        // Prevent reacting to our own echo
-        if (msg.sender_id === currentUserId) return;
+    // dm_received events arrive in bursts (e.g. after a reconnect); buffer them
+    // briefly and fetch every ciphertext slice in one batch request.
+    let pendingDmIds: string[] = [];
+    let dmFlushTimer: ReturnType<typeof setTimeout> | null = null;
 
-        // Fetch only this message's device-specific ciphertext slice instead of
-        // refetching the full history. Falls back to loadDMMessages() if the
-        // single-message endpoint is unavailable (404 / network error).
-        try {
-          const { deviceId: myDeviceId } = await resolveTrustedLocalDevice();
-          const token = localStorage.getItem("token");
+    const flushDMReceived = async () => {
+      dmFlushTimer = null;
+      const messageIds = pendingDmIds.splice(0, DM_CIPHERTEXT_BATCH_SIZE);
+      if (pendingDmIds.length > 0) {
+        dmFlushTimer = setTimeout(flushDMReceived, 0);
+      }
 
-          const res = await fetch(
-            `${process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"}/dm/messages/${msg.id}/my-ciphertext?device_id=${myDeviceId}`,
-            { headers: { Authorization: `Bearer ${token}` } },
-          );
+      try {
+        const { deviceId: myDeviceId } = await resolveTrustedLocalDevice();
+        const response = await directMessagesAPI.getMyCiphertexts(
+          myDeviceId,
+          messageIds,
+        );
+        const { ciphertexts, missing } = response.data as {
+          ciphertexts: any[];
+          missing: string[];
+        };
 
-          if (!res.ok) {
-            // Endpoint not yet deployed or message not ready — fall back gracefully
-            await loadDMMessages();
-            return;
-          }
+        const newMsgs = await Promise.all(
+          ciphertexts.map(async (slice) => {
+            let decryptedContent: string | undefined;
+            try {
+              decryptedContent = await decryptDM(
+                slice.id,
+                slice.epoch,
+                slice.encrypted_ciphertext,
+                slice.sender_public_key,
+              );
+            } catch {
+              // Decryption failed — still append with failed flag so the UI shows the right status
+            }
+            return {
+              ...slice,
+              is_encrypted: true,
+              decryptedContent,
+              decryptionFailed: !decryptedContent,
+            } as DirectMessage;
+          }),
+        );
 
-          const slice = await res.json();
-          // slice shape: { encrypted_ciphertext, sender_public_key, epoch, id, created_at, sender_id }
+        setMessages((prev) => {
+          const seen = new Set(prev.map((m) => m.id));
+          const fresh = newMsgs.filter((m) => !seen.has(m.id)); // deduplicate
+          return fresh.length > 0 ? [...prev, ...fresh] : prev;
+        });
 
-          let decryptedContent: string | undefined;
-          try {
-            decryptedContent = await decryptDM(
-              slice.id,
-              slice.epoch,
-              slice.encrypted_ciphertext,
-              slice.sender_public_key,
-            );
-          } catch {
-            // Decryption failed — still append with failed flag so the UI shows the right status
-          }
+        if (missing.length > 0) {
+          // Some slices are not ready yet — fall back to a full refetch
+          await loadDMMessages();
+        }
+      } catch {
+        // Any unexpected error — full refetch as last resort
+        await loadDMMessages();
+      }
+    };
 
-          const newMsg: DirectMessage = {
-            ...slice,
-            is_encrypted: true,
-            decryptedContent,
-            decryptionFailed: !decryptedContent,
-          } as DirectMessage;
+    const handleDMReceived = (msg: ChatMessage) => {
+      if (
+        "sender_id" in msg &&
+        (msg.sender_id === dmUserId || msg.receiver_id === dmUserId)
+      ) {
+        // Prevent reacting to our own echo
+        if (msg.sender_id === currentUserId) return;
 
-          setMessages((prev) => {
-            if (prev.some((m) => m.id === newMsg.id)) return prev; // deduplicate
-            return [...prev, newMsg];
-          });
-        } catch {
-          // Any unexpected error — full refetch as last resort
-          await loadDMMessages();
+        pendingDmIds.push(msg.id);
+        if (!dmFlushTimer) {
+          dmFlushTimer = setTimeout(flushDMReceived, DM_BATCH_WINDOW_MS);
         }
       }
     };
@@ -237,10 +280,40 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
       setMessages((prev) => prev.filter((m) => m.id !== data.message_id));
     };
 
+    const handleChannelMessageUpdated = async (data: {
+      channel_id: string;
+      message: Message;
+    }) => {
+      if (data.channel_id !== channelId) return;
+      // Edits carry fresh ciphertext; decrypt it like a new message
+      const hydratedMsg = await hydrateChannelMessage(data.message);
+      setMessages((prev) =>
+        prev.map((m) => (m.id === hydratedMsg.id ? hydratedMsg : m)),
+      );
+    };
+
+    const handleChannelMessageDeleted = (data: {
+      channel_id: string;
+      message_id: string;
+    }) => {
+      if (data.channel_id !== channelId) return;
+      setMessages((prev) => prev.filter((m) => m.id !== data.message_id));
+    };
+
     if (mode === "channel") {
       EventBus.on("chat:channel_message", handleChannelMessage);
+      EventBus.on("chat:channel_message_updated", handleChannelMessageUpdated);
+      EventBus.on("chat:channel_message_deleted", handleChannelMessageDeleted);
       return () => {
         EventBus.off("chat:channel_message", handleChannelMessage);
+        EventBus.off(
+          "chat:channel_message_updated",
+          handleChannelMessageUpdated,
+        );
+        EventBus.off(
+          "chat:channel_message_deleted",
+          handleChannelMessageDeleted,
+        );
       };
     } else if (mode === "dm") {
       EventBus.on("dm:received", handleDMReceived);
@@ -248,6 +321,7 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
       EventBus.on("dm:deleted", handleDMDeleted);
       return () => {
         EventBus.off("dm:received", handleDMReceived);
+        if (dmFlushTimer) clearTimeout(dmFlushTimer);
         EventBus.off("dm:updated", handleDMUpdated);
         EventBus.off("dm:deleted", handleDMDeleted);
       };
@@ -298,12 +372,8 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
           decryptedContent: isEncrypted ? newMessage.trim() : undefined,
         };
 
+        // The backend publishes this message to the channel after commit
         setMessages((prev) => [...prev, newMsg]);
-
-        EventBus.emit("channel:message_sent", {
-          ...newMsg,
-          channel_id: channelId,
-        });
       } else if (mode === "dm" && dmUserId) {
         const { deviceId: myDeviceId } = await resolveTrustedLocalDevice();
 
@@ -312,9 +382,10 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
         const myUserId = localStorage.getItem("user_id");
         if (!myUserId) throw new Error("No user_id in localStorage");
 
-        const [myDevicesRes, targetDevicesRes] = await Promise.all([
+        const [myDevicesRes, targetDevicesRes, epochRes] = await Promise.all([
           fetchAPI(`/devices/user/${myUserId}`),
           fetchAPI(`/devices/user/${dmUserId}`),
+          directMessagesAPI.getEpoch(dmUserId),
         ]);
 
         // Normalize: both endpoints return { device_id, public_key }
@@ -331,55 +402,48 @@ export default function ChatFeed({ mode, channelId, dmUserId }: ChatFeedProps) {
           throw new Error("No devices found for DM encryption");
         }
 
-        // Step 2: Send placeholder
-        const step1Response = await directMessagesAPI.send({
-          receiver_id: dmUserId,
-          content: "[encrypted]",
-          is_encrypted: true,
-          sender_device_id: myDeviceId,
-        });
-
-        const sentMsg: DirectMessage = step1Response.data;
-
-        try {
-          // Step 3: Encrypt for all target devices
+        // Step 2: Encrypt under a client-generated id (the HKDF salt) and send
+        // the message row plus every device ciphertext in a single request.
+        // The server pushes dm_received to both parties, so no WS relay is needed.
+        const sendEncrypted = async (epoch: number) => {
+          const dmId = crypto.randomUUID();
           const ciphertexts = await encryptDM(
-            sentMsg.id,
-            sentMsg.epoch!,
+            dmId,
+            epoch,
             newMessage.trim(),
             allTargetDevices,
           );
 
-          // Step 4: Submit keys
-          await directMessagesAPI.submitDeviceKeys(sentMsg.id, ciphertexts);
-        } catch {
-          // ROLLBACK: Delete the placeholder message if key generation/upload fails
-          await directMessagesAPI.delete(sentMsg.id);
-          throw new Error("Failed to secure DM. Message creation rolled back.");
+          return directMessagesAPI.sendEncrypted({
+            id: dmId,
+            receiver_id: dmUserId,
+            sender_device_id: myDeviceId,
+            epoch,
+            content: "[encrypted]",
+            device_ciphertexts: ciphertexts.map((c) => ({
+              device_id: c.device_id,
+              encrypted_ciphertext: c.encrypted_ciphertext,
+            })),
+          });
+        };
+
+        let sendResponse;
+        try {
+          sendResponse = await sendEncrypted(epochRes.data.epoch);
+        } catch (err) {
+          // 409 → the epoch rotated between fetch and send; retry once
+          if ((err as { status?: number })?.status !== 409) throw err;
+          const freshEpochRes = await directMessagesAPI.getEpoch(dmUserId);
+          sendResponse = await sendEncrypted(freshEpochRes.data.epoch);
         }
 
+        const sentMsg: DirectMessage = sendResponse.data;
+
         // Hydrate sent message locally
         sentMsg.decryptedContent = newMessage.trim();
         sentMsg.is_encrypted = true;
 
         setMessages((prev) => [...prev, sentMsg]);
-
-        // Scrub any sensitive plaintext before broadcasting over WS
-        // We only transmit a strict shell so devices know WHICH message to fetch
-        const wsPayload = {
-          id: sentMsg.id,
-          epoch: sentMsg.epoch,
-          sender_id: currentUserId,
-          receiver_id: dmUserId,
-          created_at: sentMsg.created_at,
-          is_encrypted: true,
-        };
-
-        // Send DM notification via WebSocket
-        EventBus.emit("dm:message_sent", {
-          target_id: dmUserId,
-          message: wsPayload,
-        });
       }
 
       setNewMessage("");
@@ -18,6 +18,7 @@ import { fetchAPI } from "@/lib/api";
 import { deriveSharedSecret, deriveKey, encryptBytes } from "@/lib/crypto";
 import type { ChannelUpdate } from "@/types/api.types";
 import { resolveTrustedLocalDevice } from "@/lib/trustedDevice";
+import { fetchServerTrustedDevices } from "@/lib/serverDevices";
 
 interface EditChannelDialogProps {
   open: boolean;
@@ -64,7 +65,7 @@ export default function EditChannelDialog({
         toast.info("Initializing End-to-End Encryption...");
 
         // 1. Fetch all trusted devices for all users in server
-        const devicesRes = await fetchAPI(`/devices/server/${serverId}`);
+        const devicesRes = await fetchServerTrustedDevices(serverId);
 
         const { deviceId, privateKey: myPrivateKey } =
           await resolveTrustedLocalDevice();
@@ -19,6 +19,7 @@ import {
   fetchLiveKitToken,
   getLiveKitUrl,
   createInviteLink,
+  prefetchLiveKitTokens,
 } from "@/lib/livekit";
 import { toast } from "sonner";
 
@@ -388,6 +389,20 @@ export default function ZoneVideoRoom({ serverId }: ZoneVideoRoomProps) {
   const [zoneId, setZoneId] = useState<string | null>(null);
   const [connecting, setConnecting] = useState(false);
 
+  // Prefetch audio + private zone tokens so entering a zone skips the token fetch
+  useEffect(() => {
+    // Deferred so __phaserZones is populated by MainScene
+    const timer = setTimeout(() => {
+      const zones: { name: string; isPrivate: boolean }[] =
+        (window as any).__phaserZones ?? [];
+      const zoneIds = zones.filter((z) => z.isPrivate).map((z) => z.name);
+      prefetchLiveKitTokens(serverId, zoneIds).catch((err) =>
+        console.warn("[ZoneVideo] Token prefetch failed:", err),
+      );
+    }, 500);
+    return () => clearTimeout(timer);
+  }, [serverId]);
+
   useEffect(() => {
     const handleZoneEnter = async (data: {
       zoneId: string;
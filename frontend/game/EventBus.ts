@@ -10,6 +10,8 @@ export enum GameEvents {
   ROOM_ENTER = "room-enter",
   ZONE_ENTER = "zone-enter",
   ZONE_EXIT = "zone-exit",
+  // Server-pushed join/leave diffs of the local player's nearby set
+  PROXIMITY_UPDATE = "proximity:update",
 
   // Multiplayer Events
   PLAYER_JOINED = "player-joined",
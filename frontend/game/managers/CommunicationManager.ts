@@ -12,6 +12,7 @@
 import EventBus from "@/game/EventBus";
 import { apiClient } from "@/lib/api";
 import { wsService } from "@/lib/services/websocket.service";
+import { applyProximityUpdate, resetNearbyPeers } from "@/lib/proximity";
 
 interface Message {
   id?: string;
@@ -59,6 +60,8 @@ export class CommunicationManager {
 
     // Hook into the central stream
     EventBus.on("ws:message", this.onWsMessage);
+    // The server re-sends the nearby set on reconnect; drop the stale one
+    EventBus.on("ws:disconnected", resetNearbyPeers);
   }
 
   /**
@@ -80,6 +83,40 @@ export class CommunicationManager {
         });
         break;
 
+      case "proximity_update":
+        applyProximityUpdate({ joined: data.joined, left: data.left });
+        break;
+
+      case "channel_epoch_rotated":
+        EventBus.emit("channel_epoch_rotated", {
+          channel_id: data.channel_id,
+          epoch: data.epoch,
+        });
+        break;
+
+      case "channel_key_delivered":
+        EventBus.emit("channel_key_delivered", {
+          channel_id: data.channel_id,
+          epoch: data.epoch,
+          encrypted_channel_key: data.encrypted_channel_key,
+          owner_device_public_key: data.owner_device_public_key,
+        });
+        break;
+
+      case "channel_message_updated":
+        EventBus.emit("chat:channel_message_updated", {
+          channel_id: data.channel_id,
+          message: data.message,
+        });
+        break;
+
+      case "channel_message_deleted":
+        EventBus.emit("chat:channel_message_deleted", {
+          channel_id: data.channel_id,
+          message_id: data.message_id,
+        });
+        break;
+
       case "dm_received":
         this.handleDMReceived(data);
         break;
@@ -306,6 +343,8 @@ export class CommunicationManager {
     EventBus.off("zone:exited", this.onZoneExited);
     EventBus.off("proximity:send_message", this.onProximitySend);
     EventBus.off("ws:message", this.onWsMessage);
+    EventBus.off("ws:disconnected", resetNearbyPeers);
+    resetNearbyPeers();
   }
 }
 
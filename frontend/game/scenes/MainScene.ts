@@ -76,15 +76,6 @@ export class MainScene extends Scene {
   private readonly sendChatHandler = (data: any) => {
     wsService.send({ type: "chat_message", ...data });
   };
-  private readonly channelMessageSentHandler = (msg: any) => {
-    wsService.send({
-      type: "chat_message",
-      scope: "channel",
-      channel_id: msg.channel_id,
-      message: msg.content,
-      message_data: msg,
-    });
-  };
   private readonly dmMessageSentHandler = (data: any) => {
     wsService.send({
       type: "dm_sent",
@@ -679,7 +670,6 @@ export class MainScene extends Scene {
     });
 
     EventBus.on(GameEvents.SEND_CHAT_MESSAGE, this.sendChatHandler);
-    EventBus.on("channel:message_sent", this.channelMessageSentHandler);
     EventBus.on("dm:message_sent", this.dmMessageSentHandler);
     EventBus.on("ui:focus", this.uiFocusHandler);
     EventBus.on("ui:blur", this.uiBlurHandler);
@@ -1221,7 +1211,6 @@ export class MainScene extends Scene {
   cleanup() {
     EventBus.off(GameEvents.SEND_CHAT_MESSAGE, this.sendChatHandler);
     EventBus.off(GameEvents.REQUEST_USER_LIST, this.requestUserListHandler);
-    EventBus.off("channel:message_sent", this.channelMessageSentHandler);
     EventBus.off("dm:message_sent", this.dmMessageSentHandler);
     EventBus.off("ui:focus", this.uiFocusHandler);
     EventBus.off("ui:blur", this.uiBlurHandler);
@@ -1,9 +1,7 @@
 import { useEffect, useRef, useState } from "react";
 import EventBus, { GameEvents, PlayerPositionEvent } from "../game/EventBus";
 import { rtcManager } from "../lib/webrtc/RTCConnectionManager";
-
-const CONNECT_DISTANCE = 5;
-const DISCONNECT_DISTANCE = 7;
+import { getNearbyPeers, type ProximityUpdateEvent } from "../lib/proximity";
 
 export function useProximityPeers(myUserId: string | null) {
   const [myPosition, setMyPosition] = useState({ x: 0, y: 0 });
@@ -11,47 +9,12 @@ export function useProximityPeers(myUserId: string | null) {
     new Map(),
   );
 
-  // Logic: Check distance to ONE peer (called when they move or I move)
-  const checkDistance = (
-    userId: string,
-    peerX: number,
-    peerY: number,
-    myX: number,
-    myY: number,
-  ) => {
-    if (!myUserId || userId === myUserId) return;
-
-    const dx = Math.abs(peerX - myX);
-    const dy = Math.abs(peerY - myY);
-    const distance = Math.sqrt(dx * dx + dy * dy); // Euclidean
-
-    // Hysteresis
-    // If < 5, Connect
-    // If > 7, Disconnect
-    // Between 5-7, keep current state (handled implicitly by RTCManager not disconnecting until explicitly told)
-
-    if (distance < CONNECT_DISTANCE) {
-      // Attempt connect (initiator=true if myId > userId to avoid dual-init)
-      // Simple tie-breaker: sort IDs
-      const isInitiator = myUserId > userId;
-      rtcManager.connectToPeer(userId, isInitiator);
-    } else if (distance > DISCONNECT_DISTANCE) {
-      rtcManager.disconnectPeer(userId);
-    }
-
-    // Always update audio position if connected
-    rtcManager.updateSpatialPosition(
-      { x: myX, y: myY },
-      { x: peerX, y: peerY },
-      userId,
-    );
-  };
-
-  // Logic: Check distance to ALL peers (called when I move)
-  const checkProximity = (myX: number, myY: number) => {
-    remotePositions.current.forEach((pos, userId) => {
-      checkDistance(userId, pos.x, pos.y, myX, myY);
-    });
+  // Connect/disconnect is driven by the server's nearby-set diffs (with
+  // hysteresis applied server-side); positions only steer spatial audio.
+  const updatePeerAudio = (userId: string, myX: number, myY: number) => {
+    const pos = remotePositions.current.get(userId);
+    if (!pos) return;
+    rtcManager.updateSpatialPosition({ x: myX, y: myY }, pos, userId);
   };
 
   // Initialize Local Media on mount
@@ -70,11 +33,36 @@ export function useProximityPeers(myUserId: string | null) {
     };
   }, [myUserId]);
 
+  // Listen for the server's nearby-set diffs
+  useEffect(() => {
+    if (!myUserId) return;
+
+    const handleProximityUpdate = (update: ProximityUpdateEvent) => {
+      update.joined.forEach((userId) => {
+        // Simple tie-breaker: sort IDs to avoid dual-init
+        const isInitiator = myUserId > userId;
+        rtcManager.connectToPeer(userId, isInitiator);
+        updatePeerAudio(userId, myPosition.x, myPosition.y);
+      });
+      update.left.forEach((userId) => rtcManager.disconnectPeer(userId));
+    };
+
+    // Catch up on peers that became nearby before this hook mounted
+    handleProximityUpdate({ joined: Array.from(getNearbyPeers()), left: [] });
+
+    EventBus.on(GameEvents.PROXIMITY_UPDATE, handleProximityUpdate);
+    return () => {
+      EventBus.off(GameEvents.PROXIMITY_UPDATE, handleProximityUpdate);
+    };
+  }, [myUserId]);
+
   // Listen for MY position updates
   useEffect(() => {
     const handleMyPosition = (pos: PlayerPositionEvent) => {
       setMyPosition({ x: pos.x, y: pos.y });
-      checkProximity(pos.x, pos.y);
+      getNearbyPeers().forEach((userId) =>
+        updatePeerAudio(userId, pos.x, pos.y),
+      );
     };
 
     EventBus.on(GameEvents.PLAYER_POSITION, handleMyPosition);
@@ -91,16 +79,9 @@ export function useProximityPeers(myUserId: string | null) {
       y: number;
     }) => {
       remotePositions.current.set(data.userId, { x: data.x, y: data.y });
-
-      // Update spatial audio position
-      rtcManager.updateSpatialPosition(
-        myPosition,
-        { x: data.x, y: data.y },
-        data.userId,
-      );
-
-      // Check distance just for this user
-      checkDistance(data.userId, data.x, data.y, myPosition.x, myPosition.y);
+      if (getNearbyPeers().has(data.userId)) {
+        updatePeerAudio(data.userId, myPosition.x, myPosition.y);
+      }
     };
 
     // Also handle full list updates to populate initial positions
@@ -108,8 +89,6 @@ export function useProximityPeers(myUserId: string | null) {
       users.forEach((u) => {
         if (u.user_id !== myUserId) {
           remotePositions.current.set(u.user_id, { x: u.x, y: u.y });
-          // Check initial distance
-          checkDistance(u.user_id, u.x, u.y, myPosition.x, myPosition.y);
         }
       });
     };
@@ -9,6 +9,7 @@ import {
 } from "@/lib/crypto";
 import { resolveTrustedLocalDevice } from "@/lib/trustedDevice";
 import EventBus from "@/game/EventBus";
+import { wsService } from "@/lib/services/websocket.service";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -38,14 +39,22 @@ function makeCacheKey(channelId: string, epoch: number) {
 
 export const globalChannelKeysCache = new Map<string, ArrayBuffer>();
 
+// Current epoch per channel, as pushed over the socket on rotation
+// (channel_key_delivered). Cleared on disconnect: missed pushes aren't replayed.
+const deliveredCurrentEpochs = new Map<string, number>();
+
 export function useChannelKeys() {
   const [errorMsg, setErrorMsg] = useState<string | null>(null);
   const entitledEpochsLoadedRef = useRef<Set<string>>(new Set());
 
   useEffect(() => {
-    const handleRotation = (data: { channel_id: string }) => {
+    const handleRotation = (data: { channel_id: string; epoch: number }) => {
       if (data.channel_id) {
         globalChannelKeysCache.delete(data.channel_id);
+        const deliveredEpoch = deliveredCurrentEpochs.get(data.channel_id);
+        if (deliveredEpoch !== undefined && deliveredEpoch < data.epoch) {
+          deliveredCurrentEpochs.delete(data.channel_id);
+        }
         console.log(`Flushed old epoch key for channel ${data.channel_id}`);
       }
     };
@@ -86,8 +95,54 @@ export function useChannelKeys() {
     [],
   );
 
+  useEffect(() => {
+    // Tell the socket which device this is, so rotations push us our key
+    const registerDevice = async () => {
+      try {
+        const { deviceId } = await resolveTrustedLocalDevice();
+        wsService.send({ type: "device_register", device_id: deviceId });
+      } catch {
+        // No trusted device in this browser; keys come from the REST path
+      }
+    };
+    const handleKeyDelivered = async (
+      data: ChannelKeyResponse & { channel_id: string },
+    ) => {
+      try {
+        await decryptChannelKeyBlob(data.channel_id, data);
+        deliveredCurrentEpochs.set(data.channel_id, data.epoch);
+      } catch (err) {
+        console.error(
+          `Failed to unwrap pushed key for channel ${data.channel_id}`,
+          err,
+        );
+      }
+    };
+    const clearDelivered = () => deliveredCurrentEpochs.clear();
+
+    registerDevice();
+    EventBus.on("ws:connected", registerDevice);
+    EventBus.on("ws:disconnected", clearDelivered);
+    EventBus.on("channel_key_delivered", handleKeyDelivered);
+    return () => {
+      EventBus.off("ws:connected", registerDevice);
+      EventBus.off("ws:disconnected", clearDelivered);
+      EventBus.off("channel_key_delivered", handleKeyDelivered);
+    };
+  }, [decryptChannelKeyBlob]);
+
   const fetchCurrentChannelKey = useCallback(
     async (channelId: string) => {
+      const deliveredEpoch = deliveredCurrentEpochs.get(channelId);
+      if (deliveredEpoch !== undefined) {
+        const delivered = globalChannelKeysCache.get(
+          makeCacheKey(channelId, deliveredEpoch),
+        );
+        if (delivered) {
+          return { keyBytes: delivered, epoch: deliveredEpoch };
+        }
+      }
+
       try {
         const { deviceId } = await resolveTrustedLocalDevice();
 
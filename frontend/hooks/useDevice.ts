@@ -424,9 +424,9 @@ export function useDevice() {
     checkDeviceState();
   }, [checkDeviceState]);
 
-  // WebSocket / Polling Effect
+  // WebSocket / Long-poll Effect
   useEffect(() => {
-    let interval: NodeJS.Timeout;
+    let cancelled = false;
 
     // Fast-path WS listener
     const handleWsMsg = (data: any) => {
@@ -446,19 +446,23 @@ export function useDevice() {
     };
     EventBus.on("ws:message", handleWsMsg);
 
-    const pollStatus = async () => {
+    const pollStatus = async (wait = false) => {
       const reqId = localStorage.getItem("pending_link_request_id");
-      if (!reqId) return;
+      if (!reqId) return false;
 
       try {
+        // /wait holds the request open until approve/reject (or ~25s)
         const res = await fetch(
-          `${API_URL}/device-linking/request/${reqId}/status`,
+          wait
+            ? `${API_URL}/device-linking/request/${reqId}/wait?timeout=25`
+            : `${API_URL}/device-linking/request/${reqId}/status`,
           {
             headers: getAuthHeaders(),
           },
         );
-        if (!res.ok) return;
+        if (!res.ok) return false;
         const data = await res.json();
+        if (cancelled) return false;
 
         if (data.status === "approved") {
           if (!data.approved_by_device_public_key) {
@@ -507,17 +511,29 @@ export function useDevice() {
           setDeviceState("expired");
           localStorage.removeItem("pending_link_request_id");
         }
+        return true;
       } catch (err) {
         console.error(err);
+        return false;
+      }
+    };
+
+    const waitForApproval = async () => {
+      while (!cancelled && localStorage.getItem("pending_link_request_id")) {
+        const ok = await pollStatus(true);
+        if (!ok && !cancelled) {
+          // Back off after errors instead of hammering the server
+          await new Promise((resolve) => setTimeout(resolve, 5000));
+        }
       }
     };
 
     if (deviceState === "waiting_for_approval") {
-      interval = setInterval(pollStatus, 5000); // 5 sec poll
+      waitForApproval();
     }
 
     return () => {
-      if (interval) clearInterval(interval);
+      cancelled = true;
       EventBus.off("ws:message", handleWsMsg);
     };
   }, [deviceState, checkForPendingApprovals]);
@@ -2,22 +2,26 @@ import { fetchAPI } from "@/lib/api";
 import { deriveSharedSecret, deriveKey, encryptBytes } from "@/lib/crypto";
 import { resolveTrustedLocalDevice } from "@/lib/trustedDevice";
 import { globalChannelKeysCache } from "@/hooks/useChannelKeys";
+import { fetchServerTrustedDevices } from "@/lib/serverDevices";
 
 export async function rotateEncryptedChannels(
+  serverId: string,
   channelIds: string[],
   reason: string,
 ) {
   const { deviceId: myDeviceId, privateKey: myPrivKey } =
     await resolveTrustedLocalDevice();
 
+  // One (usually 304-revalidated) device set serves every channel in the server
+  const devices = await fetchServerTrustedDevices(serverId);
+  if (devices.length === 0) return;
+
   for (const cid of channelIds) {
     try {
       const newKeyBytes = crypto.getRandomValues(new Uint8Array(32));
-      const devices = await fetchAPI(`/channels/${cid}/devices`);
-      if (!devices || devices.length === 0) continue;
 
       const encryptedKeys = await Promise.all(
-        devices.map(async (device: any) => {
+        devices.map(async (device) => {
           const sharedSecret = await deriveSharedSecret(
             myPrivKey,
             device.public_key,
@@ -28,15 +32,19 @@ export async function rotateEncryptedChannels(
             newKeyBytes.buffer,
           );
           return {
-            target_device_id: device.id,
+            device_id: device.device_id,
             encrypted_channel_key: encryptedChannelKey,
           };
         }),
       );
 
-      await fetchAPI(`/channel-keys/${cid}/rotate?device_id=${myDeviceId}`, {
+      await fetchAPI(`/channel-keys/${cid}/rotate`, {
         method: "POST",
-        body: JSON.stringify({ encrypted_keys: encryptedKeys, reason: reason }),
+        body: JSON.stringify({
+          submitting_device_id: myDeviceId,
+          encrypted_keys: encryptedKeys,
+          reason: reason,
+        }),
       });
 
       globalChannelKeysCache.set(cid, newKeyBytes.buffer);
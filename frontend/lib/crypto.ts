@@ -241,26 +241,31 @@ export async function pushChannelKeysToNewlyLinkedDevice(
   const { deviceId: myDeviceId, privateKey: myPrivateKey } =
     await resolveTrustedLocalDevice();
 
-  // 1. Fetch all channels I have access to
-  const channels = await fetchAPI("/channel-keys/my-channels");
-  if (!channels || channels.length === 0) return;
+  // 1. Fetch my encrypted copy of the active epoch key for every channel at once
+  const { keys } = await fetchAPI(
+    `/channel-keys/my-keys?device_id=${myDeviceId}`,
+  );
+  if (!keys || keys.length === 0) return;
 
-  for (const c of channels) {
-    if (!c.is_encrypted) continue;
+  const newSharedSecret = await deriveSharedSecret(
+    myPrivateKey,
+    newDevicePublicKeyBase64,
+  );
 
+  const distributed: {
+    channel_id: string;
+    epoch: number;
+    encrypted_channel_key: string;
+  }[] = [];
+  for (const myKeyRes of keys) {
     try {
-      // 2. Fetch my encrypted copy of the active epoch key
-      const myKeyRes = await fetchAPI(
-        `/channel-keys/${c.channel_id}/my-key?device_id=${myDeviceId}`,
-      );
-
-      // 3. Decrypt it
+      // 2. Decrypt it
       const wrapKey = await deriveKey(
         await deriveSharedSecret(
           myPrivateKey,
           myKeyRes.owner_device_public_key,
         ),
-        c.channel_id,
+        myKeyRes.channel_id,
         "channel-key",
       );
       const channelKeyBytes = await decryptBytes(
@@ -268,38 +273,35 @@ export async function pushChannelKeysToNewlyLinkedDevice(
         myKeyRes.encrypted_channel_key,
       );
 
-      // 4. Re-encrypt it specifically for the newly linked device
-      const newSharedSecret = await deriveSharedSecret(
-        myPrivateKey,
-        newDevicePublicKeyBase64,
-      );
+      // 3. Re-encrypt it specifically for the newly linked device
       const newWrapKey = await deriveKey(
         newSharedSecret,
-        c.channel_id,
+        myKeyRes.channel_id,
         "channel-key",
       );
-      const newEncryptedBlob = await encryptBytes(newWrapKey, channelKeyBytes);
-
-      // 5. Submit the copy to the server via the P2P distribution endpoint
-      await fetchAPI(
-        `/channel-keys/${c.channel_id}/distribute-to-device?device_id=${myDeviceId}`,
-        {
-          method: "POST",
-          body: JSON.stringify({
-            target_device_id: newDeviceId,
-            epoch: myKeyRes.epoch,
-            encrypted_channel_key: newEncryptedBlob,
-          }),
-        },
-      );
-      console.log(
-        `Successfully distributed channel ${c.channel_id} to new device ${newDeviceId}`,
-      );
+      distributed.push({
+        channel_id: myKeyRes.channel_id,
+        epoch: myKeyRes.epoch,
+        encrypted_channel_key: await encryptBytes(newWrapKey, channelKeyBytes),
+      });
     } catch (err) {
       console.error(
-        `Failed to distribute channel ${c.channel_id} to new device`,
+        `Failed to re-wrap channel ${myKeyRes.channel_id} for new device`,
         err,
       );
     }
   }
+  if (distributed.length === 0) return;
+
+  // 4. Submit every copy to the server in one request
+  await fetchAPI(`/channel-keys/bulk-distribute?device_id=${myDeviceId}`, {
+    method: "POST",
+    body: JSON.stringify({
+      target_device_id: newDeviceId,
+      keys: distributed,
+    }),
+  });
+  console.log(
+    `Successfully distributed ${distributed.length} channel keys to new device ${newDeviceId}`,
+  );
 }
@@ -7,6 +7,7 @@ import {
 } from "livekit-client";
 import EventBus, { GameEvents } from "@/game/EventBus";
 import { fetchLiveKitToken, getLiveKitUrl } from "@/lib/livekit";
+import { getNearbyPeers, type ProximityUpdateEvent } from "@/lib/proximity";
 
 import { MAX_HEAR_RADIUS } from "@/lib/game-constants";
 export { MAX_HEAR_RADIUS };
@@ -84,6 +85,7 @@ export class ProximityAudioManager {
 
       EventBus.on(GameEvents.PLAYER_POSITION, this.handleMyMove);
       EventBus.on(GameEvents.REMOTE_PLAYER_MOVED, this.handleRemoteMove);
+      EventBus.on(GameEvents.PROXIMITY_UPDATE, this.handleProximityUpdate);
 
       await this.room.connect(getLiveKitUrl(), token);
     } catch (err) {
@@ -128,19 +130,25 @@ export class ProximityAudioManager {
     y: number;
   }) => {
     this.otherPositions.set(data.userId, { x: data.x, y: data.y });
+    if (!getNearbyPeers().has(data.userId)) return;
+    const p = this.room?.getParticipantByIdentity(data.userId);
+    if (p) this.applyProximity(p as RemoteParticipant);
+  };
+
+  // Server-pushed nearby set: only peers in it are ever audible
+  private handleProximityUpdate = (update: ProximityUpdateEvent) => {
     if (!this.room) return;
-    for (const p of this.room.remoteParticipants.values()) {
-      if (p.identity === data.userId) {
-        this.applyProximity(p);
-        break;
-      }
+    for (const id of [...update.joined, ...update.left]) {
+      const p = this.room.getParticipantByIdentity(id);
+      if (p) this.applyProximity(p as RemoteParticipant);
     }
   };
 
   private updateAllParticipants() {
     if (!this.room) return;
-    for (const p of this.room.remoteParticipants.values()) {
-      this.applyProximity(p);
+    for (const id of getNearbyPeers()) {
+      const p = this.room.getParticipantByIdentity(id);
+      if (p) this.applyProximity(p as RemoteParticipant);
     }
   }
 
@@ -153,6 +161,13 @@ export class ProximityAudioManager {
     const pos = this.otherPositions.get(participant.identity);
     const el = this.audioElements.get(participant.identity);
 
+    if (!getNearbyPeers().has(participant.identity)) {
+      // Outside the server's nearby set — silent without a distance check
+      if (el) el.volume = 0;
+      else participant.setVolume(0);
+      return;
+    }
+
     if (!pos) {
       // Position not yet known — keep silent, don't disconnect
       if (el) el.volume = 0;
@@ -211,6 +226,7 @@ export class ProximityAudioManager {
   async disconnect(): Promise<void> {
     EventBus.off(GameEvents.PLAYER_POSITION, this.handleMyMove);
     EventBus.off(GameEvents.REMOTE_PLAYER_MOVED, this.handleRemoteMove);
+    EventBus.off(GameEvents.PROXIMITY_UPDATE, this.handleProximityUpdate);
     // Remove all audio elements from DOM
     this.audioElements.forEach((el) => {
       el.pause();
@@ -5,10 +5,35 @@ export function getLiveKitUrl(): string {
   return LIVEKIT_URL;
 }
 
+// Matches MAX_PREFETCH_ZONES on the backend
+const MAX_PREFETCH_ZONES = 20;
+// Don't hand out a cached token with less than this much lifetime left
+const TOKEN_MIN_REMAINING_MS = 5 * 60 * 1000;
+
+// Tokens from /livekit/token and /livekit/tokens, keyed by auth token + room
+const tokenCache = new Map<string, { token: string; expiresAt: number }>();
+
+function cacheToken(
+  authToken: string,
+  roomName: string,
+  token: string,
+  expiresAt: number,
+) {
+  tokenCache.set(`${authToken}|${roomName}`, {
+    token,
+    expiresAt: expiresAt * 1000,
+  });
+}
+
 export async function fetchLiveKitToken(roomName: string): Promise<string> {
   const token = localStorage.getItem("token");
   if (!token) throw new Error("Not authenticated");
 
+  const cached = tokenCache.get(`${token}|${roomName}`);
+  if (cached && cached.expiresAt - Date.now() > TOKEN_MIN_REMAINING_MS) {
+    return cached.token;
+  }
+
   const res = await fetch(
     `${API_URL}/livekit/token?room_name=${encodeURIComponent(roomName)}`,
     { headers: { Authorization: `Bearer ${token}` } },
@@ -16,9 +41,42 @@ export async function fetchLiveKitToken(roomName: string): Promise<string> {
 
   if (!res.ok) throw new Error("Failed to fetch LiveKit token");
   const data = await res.json();
+  if (data.expires_at) {
+    cacheToken(token, roomName, data.token, data.expires_at);
+  }
   return data.token;
 }
 
+/**
+ * Fetches the server audio token and the zone video room tokens in one call,
+ * so later fetchLiveKitToken() calls for those rooms resolve from cache.
+ */
+export async function prefetchLiveKitTokens(
+  serverId: string,
+  zoneIds: string[],
+): Promise<void> {
+  const token = localStorage.getItem("token");
+  if (!token) throw new Error("Not authenticated");
+
+  const res = await fetch(`${API_URL}/livekit/tokens`, {
+    method: "POST",
+    headers: {
+      Authorization: `Bearer ${token}`,
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      server_id: serverId,
+      zone_ids: zoneIds.slice(0, MAX_PREFETCH_ZONES),
+    }),
+  });
+
+  if (!res.ok) throw new Error("Failed to prefetch LiveKit tokens");
+  const data = await res.json();
+  for (const room of [data.audio, ...data.video]) {
+    cacheToken(token, room.room_name, room.token, room.expires_at);
+  }
+}
+
 export async function createInviteLink(roomName: string): Promise<string> {
   const token = localStorage.getItem("token");
   if (!token) throw new Error("Not authenticated");
@@ -0,0 +1,27 @@
+import EventBus, { GameEvents } from "@/game/EventBus";
+
+// Peers within earshot, maintained from the server's proximity_update diffs.
+// The server re-sends the full set as "joined" after every (re)connect.
+const nearbyPeers = new Set<string>();
+
+export interface ProximityUpdateEvent {
+  joined: string[];
+  left: string[];
+}
+
+export function getNearbyPeers(): ReadonlySet<string> {
+  return nearbyPeers;
+}
+
+export function applyProximityUpdate(update: ProximityUpdateEvent): void {
+  update.joined.forEach((id) => nearbyPeers.add(id));
+  update.left.forEach((id) => nearbyPeers.delete(id));
+  EventBus.emit(GameEvents.PROXIMITY_UPDATE, update);
+}
+
+export function resetNearbyPeers(): void {
+  if (nearbyPeers.size === 0) return;
+  const left = Array.from(nearbyPeers);
+  nearbyPeers.clear();
+  EventBus.emit(GameEvents.PROXIMITY_UPDATE, { joined: [], left });
+}
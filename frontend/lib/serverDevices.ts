@@ -0,0 +1,58 @@
+"use client";
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+export type ServerDevice = {
+  device_id: string;
+  public_key: string;
+};
+
+type CachedDeviceSet = {
+  etag: string;
+  devices: ServerDevice[];
+};
+
+// Per-server trusted device sets, keyed by the server's device set version (ETag)
+const deviceSetCache = new Map<string, CachedDeviceSet>();
+
+/**
+ * Returns every trusted device of the server's accepted members.
+ * Revalidates with If-None-Match, so an unchanged set costs a 304 and no body.
+ */
+export async function fetchServerTrustedDevices(
+  serverId: string,
+): Promise<ServerDevice[]> {
+  const cached = deviceSetCache.get(serverId);
+  const headers: Record<string, string> = {
+    Authorization: `Bearer ${localStorage.getItem("token")}`,
+  };
+  if (cached) {
+    headers["If-None-Match"] = cached.etag;
+  }
+
+  const res = await fetch(`${API_URL}/devices/server/${serverId}`, {
+    headers,
+  });
+
+  if (res.status === 304 && cached) {
+    return cached.devices;
+  }
+
+  if (!res.ok) {
+    const errorData = await res.json().catch(() => ({}));
+    throw new Error(
+      typeof errorData.detail === "string"
+        ? errorData.detail
+        : "Failed to fetch server devices",
+    );
+  }
+
+  const devices: ServerDevice[] = await res.json();
+  const etag = res.headers.get("ETag");
+  if (etag) {
+    deviceSetCache.set(serverId, { etag, devices });
+  } else {
+    deviceSetCache.delete(serverId);
+  }
+  return devices;
+}
@@ -0,0 +1,55 @@
+"use client";
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+export type ServerPageParams = {
+  cursor?: string | null;
+  member?: boolean;
+  public?: boolean;
+  limit?: number;
+};
+
+/**
+ * One page of GET /servers/ (newest first). nextCursor comes from the
+ * X-Next-Cursor header and is null on the last page.
+ */
+export async function fetchServerPage<T>(
+  params: ServerPageParams = {},
+): Promise<{ servers: T[]; nextCursor: string | null }> {
+  const search = new URLSearchParams();
+  if (params.cursor) search.set("cursor", params.cursor);
+  if (params.member) search.set("member", "true");
+  if (params.public) search.set("public", "true");
+  if (params.limit) search.set("limit", String(params.limit));
+
+  const res = await fetch(`${API_URL}/servers/?${search.toString()}`, {
+    headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+  });
+
+  if (!res.ok) {
+    const errorData = await res.json().catch(() => ({}));
+    throw new Error(
+      typeof errorData.detail === "string"
+        ? errorData.detail
+        : "Failed to fetch servers",
+    );
+  }
+
+  return {
+    servers: await res.json(),
+    nextCursor: res.headers.get("X-Next-Cursor"),
+  };
+}
+
+/** Every server the caller is an accepted member of (walks all pages). */
+export async function fetchMyServers<T>(): Promise<T[]> {
+  const servers: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const page: { servers: T[]; nextCursor: string | null } =
+      await fetchServerPage<T>({ member: true, cursor, limit: 100 });
+    servers.push(...page.servers);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return servers;
+}
@@ -10,6 +10,7 @@ import type {
   MessageListParams,
   DirectMessageCreate,
   DirectMessageUpdate,
+  EncryptedDirectMessageCreate,
 } from "@/types/api.types";
 
 // ==================== Auth API ====================
@@ -43,8 +44,9 @@ export const authAPI = {
 
 // ==================== Servers API ====================
 export const serversAPI = {
+  // Servers the caller is a member of (first page of up to 100)
   list: async () => {
-    return apiClient.get("/servers");
+    return apiClient.get("/servers/", { params: { member: true, limit: 100 } });
   },
 
   create: async (data: ServerCreate) => {
@@ -150,6 +152,22 @@ export const directMessagesAPI = {
     return apiClient.post("/DM/messages", data);
   },
 
+  getEpoch: async (userId: string) => {
+    return apiClient.get(`/DM/epoch/${userId}`);
+  },
+
+  // Batch ciphertext slices for this device (max 100 ids per call)
+  getMyCiphertexts: async (deviceId: string, messageIds: string[]) => {
+    return apiClient.post("/DM/messages/my-ciphertext", {
+      device_id: deviceId,
+      message_ids: messageIds,
+    });
+  },
+
+  sendEncrypted: async (data: EncryptedDirectMessageCreate) => {
+    return apiClient.post("/DM/messages/encrypted", data);
+  },
+
   edit: async (messageId: string, data: DirectMessageUpdate) => {
     return apiClient.patch(`/DM/messages/${messageId}`, data);
   },
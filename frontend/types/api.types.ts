@@ -144,6 +144,15 @@ export interface DirectMessageCreate {
   sender_device_id?: string;
 }
 
+export interface EncryptedDirectMessageCreate {
+  id: string;
+  receiver_id: string;
+  sender_device_id: string;
+  epoch: number;
+  content: string;
+  device_ciphertexts: { device_id: string; encrypted_ciphertext: string }[];
+}
+
 export interface DirectMessageUpdate {
   content: string;
 }